@@ -7,6 +7,11 @@
 ########################################################################
 from gpiozero import LED, Button
 from timeit import default_timer as timer
+import os, sys
+# shared helpers (logWriter, stageProfiler) live in jf2_dampfmaschine: one copy for both projects
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "jf2_dampfmaschine"))
+from logWriter import LogWriter
+from stageProfiler import StageProfiler, installSignals
 
 led = LED(17)       # define LED pin according to BCM Numbering
 button = Button(18) # define Button pin according to BCM Numbering
@@ -14,8 +19,24 @@ button = Button(18) # define Button pin according to BCM Numbering
 start = timer()
 counter = 0
 
+# output goes through the LogWriter thread: the loop only enqueues (format, values...)
+log_every = 1           # log only every N-th iteration (changes are always logged)
+log_edges_only = False  # log only when the button changes
+logWriter = LogWriter(log_every, log_edges_only)
+PRESSED_FORMAT = "{0} Button is pressed, led turned on >>> {1}"
+RELEASED_FORMAT = "{0} Button is released, led turned off <<< {1}"
+
+# stage histograms of the loop (see stageProfiler.py): kill -USR1 reports, kill -USR2 toggles
+profile_stages = False  # time the stages from the start
+profiler = StageProfiler(("button", "led", "log"), profile_stages)
+BUTTON, LED, LOG = range(3)
+
 def program_end():
+    logWriter.close()
     print("Ending program at counter", counter)
+    print("log lines", logWriter.written, "dropped", logWriter.dropped)
+    if profiler.iterations:
+        print(profiler.report())
     end = timer()
     diff = end - start
     hz = counter / diff
@@ -30,15 +51,25 @@ def loop():
             print(counter, "enough counted")
             program_end()
             break
+        profiler.start()
         if button.is_pressed:  # if button is pressed
+            profiler.mark(BUTTON)
+            edge = not led.is_lit
             led.on()        # turn on led
-            print(counter, "Button is pressed, led turned on >>>", timer()) # print information on terminal 
+            profiler.mark(LED)
+            logWriter.log((PRESSED_FORMAT, counter, timer()), edge) # print information on terminal 
         else : # if button is relessed
+            profiler.mark(BUTTON)
+            edge = led.is_lit
             led.off() # turn off led 
-            print(counter, "Button is released, led turned off <<<", timer())    
+            profiler.mark(LED)
+            logWriter.log((RELEASED_FORMAT, counter, timer()), edge)    
+        profiler.mark(LOG)
+        profiler.end()
 
 if __name__ == '__main__':     # Program entrance
     print ('Program is starting...')
+    installSignals(profiler)
     try:
         loop()
     except KeyboardInterrupt:  # Press ctrl-c to end the program.
@@ -6,13 +6,20 @@
 # modification: 2023/05/11
 ########################################################################
 
-import smbus
+import i2cBus
+import i2cDiscovery
+from array import array
+from time import perf_counter_ns, monotonic_ns
 
 class ADCDevice(object):
     def __init__(self):
         self.cmd = 0
         self.address = 0
-        self.bus=smbus.SMBus(1)
+        self.bus=i2cBus.openBus(1, "adc", i2cBus.SAMPLING)    # shared with the other drivers on bus 1
+        self.burstRate = 0.0    # samples/s achieved by the last analogReadInto / analogReadBurst
+        self.scanChannels = ()  # channels read by scan(), see setScanChannels
+        self.scanBuffer = array('B')
+        self.scanTime = 0       # monotonic_ns timestamp of the last scan
         # print("ADCDevice init")
         
     def detectI2C(self,addr):
@@ -20,24 +27,99 @@ class ADCDevice(object):
             self.bus.write_byte(addr,0)
             print("Found device in address 0x%x"%(addr))
             return True
-        except:
+        except OSError: # no acknowledge from addr
             print("Not found device in address 0x%x"%(addr))
             return False
             
     def close(self):
         self.bus.close()
+
+    # burst reads: fill a preallocated buffer (array('B'), bytearray, memoryview) with n samples of one channel.
+    # returns the number of samples read; the achieved rate is kept in self.burstRate
+    def analogReadInto(self, chn, buffer): # generic version: one analogRead per sample
+        view = memoryview(buffer)
+        start = perf_counter_ns()
+        read = self.analogRead
+        for i in range(len(view)):
+            view[i] = read(chn)
+        return self._burstDone(len(view), start)
+
+    def analogReadBurst(self, chn, n):
+        buffer = array('B', bytes(n))
+        self.analogReadInto(chn, buffer)
+        return buffer
+
+    # scan: read a configured set of channels in one pass into the reusable self.scanBuffer
+    #   scanBuffer[i] holds the value of channels[i], scanTime the timestamp of the whole scan
+    def setScanChannels(self, channels):
+        self.scanChannels = tuple(channels)
+        self.scanBuffer = array('B', bytes(len(self.scanChannels)))
+
+    def scan(self, channels=None):
+        if channels is not None and tuple(channels) != self.scanChannels:
+            self.setScanChannels(channels)
+        self.scanTime = monotonic_ns()
+        self._scanInto(self.scanBuffer)
+        return self.scanBuffer
+
+    def _scanInto(self, buffer): # generic version: one analogRead per channel
+        read = self.analogRead
+        for i, chn in enumerate(self.scanChannels):
+            buffer[i] = read(chn)
+
+    def _burstDone(self, n, start):
+        elapsed = perf_counter_ns() - start
+        self.burstRate = n * 1e9 / elapsed if elapsed > 0 else 0.0
+        return n
         
 class PCF8591(ADCDevice):
     def __init__(self):
         super(PCF8591, self).__init__()
         self.cmd = 0x40     # The default command for PCF8591 is 0x40.
         self.address = 0x48 # 0x48 is the default i2c address for PCF8591 Module.
+        self.cmdTable = [self.cmd+chn for chn in range(4)]
+        self.setScanChannels(range(4))
         
     def analogRead(self, chn): # PCF8591 has 4 ADC input pins, chn:0,1,2,3
-        value = self.bus.read_byte_data(self.address, self.cmd+chn)
-        value = self.bus.read_byte_data(self.address, self.cmd+chn)
+        value = self.bus.read_byte_data(self.address, self.cmdTable[chn])
+        value = self.bus.read_byte_data(self.address, self.cmdTable[chn])
         return value
     
+    BLOCK_SIZE = 32     # SMBus block transfers are limited to 32 bytes
+
+    def analogReadInto(self, chn, buffer): # one block read per 31 samples
+        # every read transaction starts with the result of the previous conversion: read one more and drop it
+        view = memoryview(buffer)
+        n = len(view)
+        start = perf_counter_ns()
+        read = self.bus.read_i2c_block_data
+        address = self.address
+        cmd = self.cmdTable[chn]
+        chunk = self.BLOCK_SIZE - 1
+        pos = 0
+        while pos < n:
+            count = min(chunk, n - pos)
+            block = read(address, cmd, count + 1)
+            view[pos:pos + count] = bytes(block[1:])
+            pos += count
+        return self._burstDone(n, start)
+
+    AUTO_INCREMENT = 0x04
+
+    def setScanChannels(self, channels):
+        super(PCF8591, self).setScanChannels(channels)
+        # auto-increment mode: one block read returns the stale byte followed by the channels first .. last
+        first = min(self.scanChannels, default=0)
+        last = max(self.scanChannels, default=0)
+        self.scanCmd = self.cmd | self.AUTO_INCREMENT | first
+        self.scanLength = last - first + 2
+        self.scanIndex = [chn - first + 1 for chn in self.scanChannels]
+
+    def _scanInto(self, buffer):
+        block = self.bus.read_i2c_block_data(self.address, self.scanCmd, self.scanLength)
+        for i, index in enumerate(self.scanIndex):
+            buffer[i] = block[index]
+
     def analogWrite(self,value): # write DAC value
         self.bus.write_byte_data(address,cmd,value)	
 
@@ -46,7 +128,37 @@ class ADS7830(ADCDevice):
         super(ADS7830, self).__init__()
         self.cmd = 0x84
         self.address = 0x4b # 0x4b is the default i2c address for ADS7830 Module.   
+        self.cmdTable = [self.cmd|(((chn<<2 | chn>>1)&0x07)<<4) for chn in range(8)]
+        self.setScanChannels(range(8))
         
     def analogRead(self, chn): # ADS7830 has 8 ADC input pins, chn:0,1,2,3,4,5,6,7
-        value = self.bus.read_byte_data(self.address, self.cmd|(((chn<<2 | chn>>1)&0x07)<<4))
+        value = self.bus.read_byte_data(self.address, self.cmdTable[chn])
         return value
+
+    def setScanChannels(self, channels):
+        super(ADS7830, self).setScanChannels(channels)
+        self.scanCmds = [self.cmdTable[chn] for chn in self.scanChannels]
+
+    def _scanInto(self, buffer):
+        read = self.bus.read_byte_data
+        address = self.address
+        for i, cmd in enumerate(self.scanCmds):
+            buffer[i] = read(address, cmd)
+
+    def analogReadInto(self, chn, buffer): # write the command byte once, then plain reads convert the same channel again
+        view = memoryview(buffer)
+        start = perf_counter_ns()
+        read = self.bus.read_byte
+        address = self.address
+        self.bus.write_byte(address, self.cmdTable[chn])
+        for i in range(len(view)):
+            view[i] = read(address)
+        return self._burstDone(len(view), start)
+
+def detectADC(busnum=1): # driver of the ADC module on the bus, None if no module answers
+    address = i2cDiscovery.find("adc", busnum)  # one probe at the cached address on a normal start
+    if address == 0x48:
+        return PCF8591()
+    if address == 0x4b:
+        return ADS7830()
+    return None
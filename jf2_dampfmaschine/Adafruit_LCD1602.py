@@ -63,6 +63,22 @@ class Adafruit_CharLCD(object):
         for pin in self.pins_db:
             self.GPIO.setup(pin, GPIO.OUT)
 
+        # port expanders with write_port (PCF8574_GPIO): every enable phase is one port write
+        #   port byte of each nibble value, computed once: bit j of the nibble -> pins_db[j]
+        self.port_mode = hasattr(self.GPIO, "write_port")
+        self.nibble_port = []
+        for nibble in range(16):
+            port = 0
+            for j in range(4):
+                if nibble & (1 << j):
+                    port |= 1 << self.pins_db[j]
+            self.nibble_port.append(port)
+        self.rs_port = 1 << self.pin_rs
+        self.e_port = 1 << self.pin_e
+        self.port_mask = self.rs_port | self.e_port
+        for pin in self.pins_db:
+            self.port_mask |= 1 << pin
+
         self.write4bits(0x33)  # initialization
         self.write4bits(0x32)  # initialization
         self.write4bits(0x28)  # 2 line 5x7 matrix
@@ -160,19 +176,27 @@ class Adafruit_CharLCD(object):
     def write4bits(self, bits, char_mode=False):
         """ Send command to LCD """
         self.delayMicroseconds(1000)  # 1000 microsecond sleep
-        bits = bin(bits)[2:].zfill(8)
+        if self.port_mode:
+            rs = self.rs_port if char_mode else 0
+            write_port = self.GPIO.write_port
+            for nibble in (bits >> 4, bits & 0x0F):
+                port = self.nibble_port[nibble] | rs
+                write_port(port, self.port_mask)                 # data + RS, E low
+                write_port(port | self.e_port, self.port_mask)   # E high: each bus write takes > 450ns
+                write_port(port, self.port_mask)                 # E low
+            return
         self.GPIO.output(self.pin_rs, char_mode)
         for pin in self.pins_db:
             self.GPIO.output(pin, False)
-        for i in range(4):
-            if bits[i] == "1":
-                self.GPIO.output(self.pins_db[::-1][i], True)
+        for j in range(4):
+            if bits & (0x10 << j):
+                self.GPIO.output(self.pins_db[j], True)
         self.pulseEnable()
         for pin in self.pins_db:
             self.GPIO.output(pin, False)
-        for i in range(4, 8):
-            if bits[i] == "1":
-                self.GPIO.output(self.pins_db[::-1][i-4], True)
+        for j in range(4):
+            if bits & (0x01 << j):
+                self.GPIO.output(self.pins_db[j], True)
         self.pulseEnable()
 
     def delayMicroseconds(self, microseconds):
@@ -7,6 +7,8 @@
 ########################################################################
 from PCF8574 import PCF8574_GPIO
 from Adafruit_LCD1602 import Adafruit_CharLCD
+from lcdService import LcdService
+import i2cDiscovery
 
 from time import sleep, strftime
 from datetime import datetime
@@ -23,32 +25,32 @@ def get_time_now():     # get system time
 def loop():
     mcp.output(3,1)     # turn on LCD backlight
     lcd.begin(16,2)     # set number of LCD lines and columns
+    lcdService = LcdService(lcd)    # draws in its own thread
     while(True):         
         #lcd.clear()
-        lcd.setCursor(0,0)  # set cursor position
-        lcd.message( 'CPU: ' + get_cpu_temp()+'\n' )# display CPU temperature
-        lcd.message( get_time_now() )   # display the time
+        lcdService.set_line(0, 'CPU: ' + get_cpu_temp() )# display CPU temperature
+        lcdService.set_line(1, get_time_now() )   # display the time
         sleep(1)
         
 def destroy():
     lcd.clear()
     
-PCF8574_address = 0x27  # I2C address of the PCF8574 chip.
-PCF8574A_address = 0x3F  # I2C address of the PCF8574A chip.
-# Create PCF8574 GPIO adapter.
-try:
-    mcp = PCF8574_GPIO(PCF8574_address)
-except:
-    try:
-        mcp = PCF8574_GPIO(PCF8574A_address)
-    except:
+mcp = None  # PCF8574_GPIO and Adafruit_CharLCD, created by initLCD
+lcd = None
+def initLCD():
+    global mcp, lcd
+    # Create PCF8574 GPIO adapter, PCF8574 (0x27) or PCF8574A (0x3F), address cached by i2cDiscovery
+    address = i2cDiscovery.find("lcd")
+    if address is None:
         print ('I2C Address Error !')
         exit(1)
-# Create LCD, passing in MCP GPIO adapter.
-lcd = Adafruit_CharLCD(pin_rs=0, pin_e=2, pins_db=[4,5,6,7], GPIO=mcp)
+    mcp = PCF8574_GPIO(address)
+    # Create LCD, passing in MCP GPIO adapter.
+    lcd = Adafruit_CharLCD(pin_rs=0, pin_e=2, pins_db=[4,5,6,7], GPIO=mcp)
 
 if __name__ == '__main__':
     print ('Program is starting ... ')
+    initLCD()
     try:
         loop()
     except KeyboardInterrupt:
@@ -3,17 +3,49 @@
 # JF from Freenove_RFID_Starter_Kit_for_Raspberry_Pi/Code/Python_GPIOZero_Code/20.1.1_I2CLCD1602
 
 import time
-import smbus
-import subprocess
+import i2cBus
+import i2cDiscovery
 
 class CharLCD1602(object):
-    def __init__(self):
+    BLOCK_SIZE = 8      # bytes per I2C message in fast mode: 2 characters, short enough to let ADC reads in between
+
+    # fast=True: every byte for the display is encoded into its PCF8574 port bytes
+    #   (EN high / EN low for both nibbles) and sent with multi-byte I2C writes;
+    #   the bus transfer itself is slower than the HD44780 timing, so only clear needs a sleep
+    def __init__(self, fast=False):
         # Note you need to change the bus number to 0 if running on a revision 1 Raspberry Pi.
-        self.bus = smbus.SMBus(1)
+        self.bus = i2cBus.openBus(1, "lcd", i2cBus.DISPLAY)    # shared with the other drivers on bus 1
         self.BLEN = 1  # turn on/off background light
         self.PCF8574_address = 0x27  # I2C address of the PCF8574 chip.
         self.PCF8574A_address = 0x3f  # I2C address of the PCF8574A chip.
         self.LCD_ADDR =self.PCF8574_address  
+        # shadow framebuffer: character code shown in each cell, -1 = unknown
+        self.COLS = 16
+        self.ROWS = 2
+        self.shadow = [[-1] * self.COLS for row in range(self.ROWS)]
+        self.cursor = None  # DDRAM address of the cursor, None = unknown
+        self.fast = fast
+        self.pending = bytearray()  # fast mode: port bytes not yet sent
+        self.batch = False          # fast mode: collect port bytes until flush()
+        self.buildCodes()
+    def buildCodes(self): # fast mode: port bytes of every byte value, for commands (RS=0) and data (RS=1)
+        bl = 0x08 if self.BLEN == 1 else 0x00
+        self.codes = []
+        for rs in (0x00, 0x01):
+            table = []
+            for data in range(256):
+                high = (data & 0xF0) | bl | rs
+                low = ((data & 0x0F) << 4) | bl | rs
+                table.append(bytes((high | 0x04, high, low | 0x04, low)))   # EN = 1, EN = 0 per nibble
+            self.codes.append(table)
+    def flush(self): # fast mode: send the pending port bytes, BLOCK_SIZE bytes per I2C message
+        buf = self.pending
+        try:
+            for i in range(0, len(buf), self.BLOCK_SIZE):
+                chunk = buf[i:i + self.BLOCK_SIZE]
+                self.bus.write_i2c_block_data(self.LCD_ADDR, chunk[0], list(chunk[1:]))
+        finally:
+            del buf[:]      # after a bus error too: the next write must not resend a half sent batch
     def write_word(self,addr, data):
         temp = data
         if self.BLEN == 1:
@@ -23,6 +55,12 @@ class CharLCD1602(object):
         self.bus.write_byte(addr ,temp)
 
     def send_command(self,comm):
+        self.cursor = None
+        if self.fast:
+            self.pending += self.codes[0][comm]
+            if not self.batch:
+                self.flush()
+            return
         # Send bit7-4 firstly
         buf = comm & 0xF0
         buf |= 0x04               # RS = 0, RW = 0, EN = 1
@@ -39,6 +77,15 @@ class CharLCD1602(object):
         self.write_word(self.LCD_ADDR ,buf)
 
     def send_data(self,data):
+        if data > 0xFF:
+            data = 0x3F         # no character of the display: '?' in both modes
+        if self.cursor is not None:
+            self.cursor += 1    # DDRAM address auto increments
+        if self.fast:
+            self.pending += self.codes[1][data]
+            if not self.batch:
+                self.flush()
+            return
         # Send bit7-4 firstly
         buf = data & 0xF0
         buf |= 0x05               # RS = 1, RW = 0, EN = 1
@@ -54,28 +101,21 @@ class CharLCD1602(object):
         buf &= 0xFB               # Make EN = 0
         self.write_word(self.LCD_ADDR ,buf)
 
-    def i2c_scan(self):
-        cmd = "i2cdetect -y 1 |awk \'NR>1 {$1=\"\";print}\'"
-        result = subprocess.check_output(cmd, shell=True).decode()
-        result = result.replace("\n", "").replace(" --", "")
-        i2c_list = result.split(' ')
-        return i2c_list
+    def i2c_scan(self): # answering candidate addresses as hex strings, like i2cdetect: ['27', '48']
+        return ['%x' % address for address, name in i2cDiscovery.scan()]
 
     def init_lcd(self,addr=None, bl=1):
-        i2c_list = self.i2c_scan()
-#         print(f"i2c_list: {i2c_list}")
         if addr is None:
-            if '27' in i2c_list:
-                self.LCD_ADDR = self.PCF8574_address
-            elif '3f' in i2c_list:
-                self.LCD_ADDR = self.PCF8574A_address
-            else:
+            found = i2cDiscovery.find("lcd")   # 0x27 or 0x3f; one probe at the cached address on a normal start
+            if found is None:
                 raise IOError("I2C address 0x27 or 0x3f no found.")
+            self.LCD_ADDR = found
         else:
             self.LCD_ADDR = addr
-            if str(hex(addr)).strip('0x') not in i2c_list:
+            if not i2cDiscovery.probe(self.bus, addr):
                 raise IOError(f"I2C address {str(hex(addr))} or 0x3f no found.")    
         self.BLEN = bl
+        self.buildCodes()
         try:
             self.send_command(0x33) # Must initialize to 8-line mode at first
             time.sleep(0.005)
@@ -85,7 +125,7 @@ class CharLCD1602(object):
             time.sleep(0.005)
             self.send_command(0x0C) # Enable display without cursor
             time.sleep(0.005)
-            self.send_command(0x01) # Clear Screen
+            self.clear()
             self.buswrite_byte(self.LCD_ADDR, 0x08)
             #self.bus.write_byte(self.LCD_ADDR, 0x08)    # JF: ???
         except Exception as inst:
@@ -96,6 +136,16 @@ class CharLCD1602(object):
 
     def clear(self):
         self.send_command(0x01) # Clear Screen
+        if self.fast:
+            time.sleep(0.002)   # clear display takes 1.52 ms
+        for row in self.shadow:
+            row[:] = [0x20] * self.COLS
+        self.cursor = 0x80
+
+    def invalidate(self): # forget the shadow framebuffer and the cursor: the next write sends every cell again
+        for row in self.shadow:
+            row[:] = [-1] * self.COLS
+        self.cursor = None
 
     def openlight(self):  # Enable the backlight
         self.bus.write_byte(0x27,0x08)
@@ -110,29 +160,50 @@ class CharLCD1602(object):
             y = 0
         if y > 1:
             y = 1
-        # Move cursor
-        addr = 0x80 + 0x40 * y + x
-        self.send_command(addr)
-        for chr in str:
-            self.send_data(ord(chr))
+        # only cells that differ from the shadow framebuffer are sent,
+        # the cursor is only moved if it is not already at the cell
+        row = self.shadow[y]
+        self.batch = True
+        try:
+            for chr in str:
+                if x >= self.COLS:
+                    break
+                data = ord(chr)
+                if data > 0xFF:
+                    data = 0x3F     # as send_data, so the shadow matches the display
+                if row[x] != data:
+                    addr = 0x80 + 0x40 * y + x
+                    if self.cursor != addr:
+                        self.send_command(addr)
+                        self.cursor = addr
+                    self.send_data(data)
+                    row[x] = data
+                x += 1
+        finally:
+            self.batch = False
+            self.flush()
     def display_num(self,x, y, num):
         addr = 0x80 + 0x40 * y + x
         self.send_command(addr)
         self.send_data(num)
+        if x < self.COLS:
+            self.shadow[y][x] = num
+    def close(self):
+        self.bus.close()
         
 def loop():
     count = 0
+    lcd1602.clear()
     while(True):
-        lcd1602.clear()
         lcd1602.write(0, 0, '  Hello World!  ' )# display CPU temperature
-        lcd1602.write(0, 1, '  Counter: ' + str(count) )   # display the time
+        lcd1602.write(0, 1, ('  Counter: ' + str(count)).ljust(16) )   # display the time
         time.sleep(1)
         count += 1
 def destroy():
     lcd1602.clear()
-lcd1602 = CharLCD1602()  
 if __name__ == '__main__':
     print ('Program is starting ... ')
+    lcd1602 = CharLCD1602()  
     lcd1602.init_lcd(addr=None, bl=1)
     try:
         loop()
@@ -4,7 +4,7 @@
 # Author      : freenove
 # modification: 2022/06/28
 ########################################################################
-import smbus
+import i2cBus
 import time
 class PCF8574_I2C(object):
     OUPUT = 0
@@ -12,7 +12,7 @@ class PCF8574_I2C(object):
     
     def __init__(self,address):
         # Note you need to change the bus number to 0 if running on a revision 1 Raspberry Pi.
-        self.bus = smbus.SMBus(1)
+        self.bus = i2cBus.openBus(1, "pcf8574", i2cBus.DISPLAY)    # shared with the other drivers on bus 1
         self.address = address
         self.currentValue = 0
         self.writeByte(0)   #I2C test.
@@ -25,8 +25,11 @@ class PCF8574_I2C(object):
         self.currentValue = value
         self.bus.write_byte(self.address,value)
 
+    def writePort(self,value,mask=0xFF):#Write the pins in mask at once, keep the others (one bus write)
+        self.writeByte((self.currentValue & ~mask) | (value & mask))
+
     def digitalRead(self,pin):#Read PCF8574 one port of the data
-        value = readByte()  
+        value = self.readByte()  
         return (value&(1<<pin)==(1<<pin)) and 1 or 0
         
     def digitalWrite(self,pin,newvalue):#Write data to PCF8574 one port
@@ -65,6 +68,16 @@ class PCF8574_GPIO(object):#Standardization function interface
         return self.chip.digitalRead(pin)
     def output(self,pin,value):#Write data to PCF8574 one port
         self.chip.digitalWrite(pin,value)
+    def output_many(self,pins,values):#Write several ports with one bus write
+        mask = 0
+        bits = 0
+        for pin, value in zip(pins, values):
+            mask |= 1 << pin
+            if value:
+                bits |= 1 << pin
+        self.chip.writePort(bits,mask)
+    def write_port(self,value,mask=0xFF):#Write the pins in mask at once: value is the port byte
+        self.chip.writePort(value,mask)
         
 def destroy():
     bus.close()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : Sampler.py
+# Description : background ADC acquisition into a preallocated ring buffer
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import threading
+from array import array
+from time import monotonic_ns, sleep
+
+###########################################################################
+# ring buffer of (timestamp_ns, value) pairs
+#   fixed size (rounded up to a power of 2), backed by two arrays
+#   the writer never blocks: if the reader falls behind, the oldest
+#   samples are overwritten and counted in overruns
+###########################################################################
+class SampleRing(object):
+    def __init__(self, capacity=4096):
+        size = 1 << max(capacity - 1, 1).bit_length()
+        self.capacity = size
+        self.mask = size - 1
+        self.times = array('q', bytes(8 * size))
+        self.values = array('B', bytes(size))
+        self.head = 0       # number of samples ever written
+        self.tail = 0       # number of samples ever read (or dropped)
+        self.overruns = 0   # number of samples overwritten before they were read
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def put(self, timestamp, value):
+        with self.lock:
+            head = self.head
+            if head - self.tail == self.capacity:
+                self.tail += 1
+                self.overruns += 1
+            i = head & self.mask
+            self.times[i] = timestamp
+            self.values[i] = value
+            self.head = head + 1
+
+    def drainInto(self, times, values):
+        """ copy up to len(times) of the oldest samples into times/values, return the count """
+        with self.lock:
+            tail = self.tail
+            n = min(self.head - tail, len(times))
+            start = tail & self.mask
+            first = min(n, self.capacity - start)   # up to the end of the arrays, the rest wraps around
+            times[0:first] = self.times[start:start + first]
+            values[0:first] = self.values[start:start + first]
+            if n > first:
+                times[first:n] = self.times[0:n - first]
+                values[first:n] = self.values[0:n - first]
+            self.tail = tail + n
+        return n
+
+    def drain(self, maxCount=None):
+        """ return (times, values) arrays with up to maxCount of the oldest samples """
+        n = len(self) if maxCount is None else min(maxCount, len(self))
+        times = array('q', bytes(8 * n))
+        values = array('B', bytes(n))
+        n = self.drainInto(times, values)
+        return times[:n], values[:n]
+
+
+###########################################################################
+# sampler thread
+#   reads one ADC channel as fast as possible (or every interval_s)
+#   and writes the samples into a SampleRing, independent of the consumer
+###########################################################################
+class Sampler(object):
+    def __init__(self, adc, channel=0, capacity=4096, interval_s=0):
+        self.adc = adc
+        self.channel = channel
+        self.interval_s = interval_s
+        self.ring = SampleRing(capacity)
+        self.count = 0
+        self.startTime = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.startTime = monotonic_ns()
+        self.thread = threading.Thread(target=self._run, name="Sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        read = self.adc.analogRead
+        put = self.ring.put
+        chn = self.channel
+        interval = self.interval_s
+        while self.running:
+            value = read(chn)
+            put(monotonic_ns(), value)
+            self.count += 1
+            if interval:
+                sleep(interval)
+
+    @property
+    def overruns(self):
+        return self.ring.overruns
+
+    @property
+    def samplesPerSecond(self):
+        elapsed = monotonic_ns() - self.startTime
+        return self.count * 1e9 / elapsed if self.startTime and elapsed > 0 else 0.0
+
+    def drainInto(self, times, values):
+        return self.ring.drainInto(times, values)
+
+    def drain(self, maxCount=None):
+        return self.ring.drain(maxCount)
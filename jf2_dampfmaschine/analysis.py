@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : analysis.py
+# Description : offline edge detection, rpm and duty cycle over whole
+#               sample arrays (numpy), e.g. from a capture file
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import numpy
+
+###########################################################################
+# threshold: same formula as the live loop (revolutionEngine.THRESHOLD)
+#   voltage = value / 255.0 * 3.3, HIGH if voltage >= 3.3/2
+###########################################################################
+def levels(values):
+    return numpy.asarray(values) / 255.0 * 3.3 >= (3.3/2)
+
+
+###########################################################################
+# registered changes, identical to the live loop (revolutionEngine.RevolutionCounter):
+#   a sample whose level differs from the current state is a change,
+#   if at least debounce_s passed since the last registered change;
+#   otherwise it is an ignored event and the state stays
+#
+#   thresholding and run detection are vectorized; the debounce, which
+#   depends on the previous registered change, runs once per run of
+#   equal samples (not per sample) with a binary search inside the run
+#
+#   returns (indices of the registered changes, number of ignored events)
+###########################################################################
+def detectChanges(times, high, debounce_s=0.005, state=False, lastChange=0.0):
+    times = numpy.asarray(times, dtype=numpy.float64)
+    high = numpy.asarray(high, dtype=bool)
+    n = len(high)
+    if n == 0:
+        return numpy.empty(0, dtype=numpy.int64), 0
+    boundaries = numpy.flatnonzero(high[1:] != high[:-1]) + 1
+    starts = numpy.concatenate(([0], boundaries))
+    ends = numpy.concatenate((boundaries, [n]))
+    runLevels = high[starts]
+
+    changes = []
+    ignored = 0
+    for start, end, level in zip(starts.tolist(), ends.tolist(), runLevels.tolist()):
+        if level == state:
+            continue
+        j = max(start, int(numpy.searchsorted(times, lastChange + debounce_s)))
+        # searchsorted works on lastChange + debounce_s: step to the exact test of the live loop
+        while j > start and times[j - 1] - lastChange >= debounce_s:
+            j -= 1
+        while j < end and times[j] - lastChange < debounce_s:
+            j += 1
+        if j < end:
+            ignored += j - start
+            changes.append(j)
+            state = level
+            lastChange = times[j]
+        else:
+            ignored += end - start
+    return numpy.array(changes, dtype=numpy.int64), ignored
+
+
+###########################################################################
+# rpm of every complete revolution (changes_per_spoke * number_of_spokes changes)
+#   returns (end time of each revolution, rpm)
+###########################################################################
+def revolutionRpm(changeTimes, changes_per_spoke=2, number_of_spokes=5):
+    changeTimes = numpy.asarray(changeTimes, dtype=numpy.float64)
+    revolutions = changeTimes[::changes_per_spoke * number_of_spokes]
+    periods = numpy.diff(revolutions)
+    return revolutions[1:], 60.0 / periods
+
+
+###########################################################################
+# duty cycle of every complete cycle HIGH -> LOW -> HIGH
+#   duty = HIGH duration / cycle period
+#   returns (start time of each cycle, duty 0 .. 1)
+###########################################################################
+def dutyCycles(changeTimes, changeLevels):
+    changeTimes = numpy.asarray(changeTimes, dtype=numpy.float64)
+    rising = numpy.flatnonzero(numpy.asarray(changeLevels, dtype=bool))
+    rising = rising[rising + 2 < len(changeTimes)]
+    start = changeTimes[rising]
+    return start, (changeTimes[rising + 1] - start) / (changeTimes[rising + 2] - start)
+
+
+class Analysis(object):
+    def __init__(self, times, values, debounce_s=0.005, changes_per_spoke=2, number_of_spokes=5, edges=False):
+        self.times = numpy.asarray(times, dtype=numpy.float64)
+        self.high = numpy.asarray(values) != 0 if edges else levels(values)
+        self.changeIndex, self.ignored = detectChanges(self.times, self.high, debounce_s)
+        self.changeTimes = self.times[self.changeIndex]
+        self.changeLevels = self.high[self.changeIndex]
+        self.revolutionTimes, self.rpm = revolutionRpm(self.changeTimes, changes_per_spoke, number_of_spokes)
+        self.dutyTimes, self.duty = dutyCycles(self.changeTimes, self.changeLevels)
+
+    @classmethod
+    def fromCapture(cls, path, debounce_s=0.005, channel=None):
+        """ the records of one channel (default: the channel of the header), like revolutionEngine.ReplaySource """
+        import capture
+        with capture.CaptureReader(path) as reader:
+            if channel is None:
+                channel = reader.channel
+            records = reader.records()
+            records = records[records["channel"] == channel]     # a copy, independent of the mapping
+            times = records["t_ns"] / 1e9
+            values = numpy.array(records["value"])
+            return cls(times, values, debounce_s, reader.changes_per_spoke, reader.number_of_spokes,
+                       edges=(reader.kind == capture.EDGE))
+
+
+if __name__ == '__main__':   # Program entrance
+    import argparse
+    parser  = argparse.ArgumentParser()
+    parser.add_argument("capture", help="capture file (see capture.py)")
+    parser.add_argument("-d", "--debounce", help="ignore changes within this many seconds; default 0.005", type=float, default=0.005)
+    parser.add_argument("-c", "--channel", help="ADC channel or GPIO pin of the records; default: the channel of the file header", type=int)
+    args = parser.parse_args()
+
+    analysis = Analysis.fromCapture(args.capture, args.debounce, args.channel)
+    duration = analysis.times[-1] - analysis.times[0] if len(analysis.times) else 0
+    print("samples", len(analysis.times), "in {:.3f} s".format(duration),
+          "changes", len(analysis.changeIndex), "ignored events", analysis.ignored)
+    if len(analysis.rpm):
+        print("rpm: mean {:.2f} min {:.2f} max {:.2f} over {} revolutions".format(
+            analysis.rpm.mean(), analysis.rpm.min(), analysis.rpm.max(), len(analysis.rpm)))
+    if len(analysis.duty):
+        print("duty: mean {:.2f}% min {:.2f}% max {:.2f}%".format(
+            100 * analysis.duty.mean(), 100 * analysis.duty.min(), 100 * analysis.duty.max()))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : benchmark.py
+# Description : hardware-free end-to-end benchmark: the counting loops on
+#               the simulated I2C bus (simBus.py) and gpiozero mock pins,
+#               driven by the spoked wheel model (signalModel.py);
+#               finds the max trackable rpm
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import os
+import tempfile
+import time
+import i2cBus
+import i2cDiscovery
+from simBus import SimBus, PCF8591Sim, ADS7830Sim, PCF8574LcdSim
+from signalModel import SpokedWheel, PinDriver
+from revolutionEngine import RevolutionCounter, SamplerSource, createSource, LDR_PIN, IR_PIN
+
+###########################################################################
+# every rpm of the sweep runs duration_s with a new RevolutionCounter,
+# the loop is the one of the scripts: source.poll, LED on every change,
+# one log line per poll (LogWriter into /dev/null)
+#   adc:     jf2_dampfmaschine.loop, analogRead in the loop
+#   sampler: jf2_dampfmaschine.samplerLoop, Sampler thread + batches
+#   digital: testLoop -d, LDR on a pin (PinDriver on the mock pin)
+#   ir:      testLoop -i, IR breakbeam, inverted
+#
+# counted rpm: rate of the registered changes between the second and the
+# last one; tracked if it is within tolerance of the wheel rpm. The first
+# change is left out: a new counter starts LOW, so a first HIGH sample
+# registers a change that is no edge of the wheel
+#
+# the result depends on the machine: the bus is simulated, but the loop,
+# the sleeps and the threads run on the real CPU and scheduler; near the
+# limit (about 1000 rpm with the PCF8591 at 5 ms debounce) the same step
+# can pass on one run and fail on the next. tests/test_benchmark.py
+# checks a low rpm only
+#
+# time scale 0: the bus never waits, so the loop never releases the GIL;
+# the LogWriter thread then runs in slices of sys.getswitchinterval()
+# (5 ms) and stalls the loop that long, which fails at high rpm
+###########################################################################
+SOURCES = ("adc", "sampler", "digital", "ir")
+SWEEP = (60, 120, 240, 480, 960, 1920, 3840, 7680)
+HEADER_FORMAT = "{:>8} {:>10} {:>8} {:>10} {:>9} {:>8} {:>8} {:>8}"
+RESULT_FORMAT = "{:>8.0f} {:>10.1f} {:>8.2%} {:>10.1f} {:>9.0f} {:>8} {:>8} {:>8}"
+LOG_FORMAT = "rps {0:.2f} voltage {1:.2f}"
+CACHE_PATH = os.path.join(tempfile.gettempdir(), "jf2_simbus_i2c.json")
+
+
+def simulate(wheel, adc="pcf8591", timeScale=1.0):
+    """ bus 1 of every driver becomes a SimBus: the ADC with the wheel on channel 0, and the LCD; returns (adc, lcd) devices """
+    if adc == "pcf8591":
+        adcSim = PCF8591Sim(inputs=[wheel.value])
+    else:
+        adcSim = ADS7830Sim(inputs=[wheel.value])
+    lcdSim = PCF8574LcdSim(timeScale=timeScale)
+    i2cBus.setBusFactory(lambda busnum: SimBus([adcSim, lcdSim], timeScale=timeScale))
+    i2cDiscovery.CACHE_PATH = CACHE_PATH     # the address cache of the real bus stays untouched
+    return adcSim, lcdSim
+
+
+def measure(source, wheel, rpm, duration_s, debounce_s=0.005, led=None, logWriter=None, lcdService=None):
+    """ one step of the sweep: (wheel rpm, counted rpm, error, displayed rpm, samples/s, changes, expected, ignored) """
+    wheel.setProfile(rpm)
+    counter = RevolutionCounter(debounce_s, 2, wheel.spokes)
+    changes = []    # timestamps of the first two changes
+    def changed(counter, timestamp):
+        if len(changes) < 2:
+            changes.append(timestamp)
+        if led is not None:
+            led.value = counter.state
+    counter.when_change = changed
+    if isinstance(source, SamplerSource):
+        while source.read():    # samples of the previous step
+            pass
+    start = time.monotonic()
+    w0 = wheel.now()
+    end = start + duration_s
+    nextLcd = start
+    now = start
+    while now < end:
+        if source.poll(counter) == 0:
+            time.sleep(0.001)
+        elif logWriter is not None:
+            logWriter.log((LOG_FORMAT, counter.rps(source.timestamp), source.value / 255.0 * 3.3))
+        now = time.monotonic()
+        if lcdService is not None and now >= nextLcd:
+            lcdService.set_line(1, "{:>6.0f} rpm".format(counter.rpm(source.timestamp)))
+            nextLcd = now + 0.2
+    expected = wheel.changes(w0, wheel.now())
+    counted = 0.0
+    if counter.changes > 3:
+        counted = (counter.changes - 2) / (counter.lastChange - changes[1]) / (2 * wheel.spokes) * 60
+    error = abs(counted - rpm) / rpm
+    return (rpm, counted, error, counter.rpm(source.timestamp), counter.samples / (now - start),
+            counter.changes, expected, counter.ignored)
+
+
+if __name__ == '__main__':   # Program entrance
+    import argparse
+    parser  = argparse.ArgumentParser()
+    parser.add_argument("rpm", help="rpm steps; default: " + " ".join(str(rpm) for rpm in SWEEP), type=float, nargs="*", default=SWEEP)
+    parser.add_argument("-s", "--source", help="loop to measure; default adc", choices=SOURCES, default="adc")
+    parser.add_argument("-a", "--adc", help="simulated ADC module; default pcf8591", choices=("pcf8591", "ads7830"), default="pcf8591")
+    parser.add_argument("-d", "--duration", help="seconds per rpm step; default 2", type=float, default=2.0)
+    parser.add_argument("-D", "--debounce", help="threshold_ignore_change_s of the counter; default 0.005", type=float, default=0.005)
+    parser.add_argument("-n", "--spokes", help="number of spokes; default 5", type=int, default=5)
+    parser.add_argument("-N", "--noise", help="noise of the LDR signal, ADC codes; default 0", type=float, default=0.0)
+    parser.add_argument("-b", "--bounce", help="bounce after every change, seconds; default 0", type=float, default=0.0)
+    parser.add_argument("-t", "--time-scale", help="bus and LCD timing, 1 real, 0 no delays; default 1", type=float, default=1.0)
+    parser.add_argument("-T", "--tolerance", help="max relative error of a tracked rpm; default 0.02", type=float, default=0.02)
+    parser.add_argument("-l", "--lcd", help="show the rpm on the simulated LCD while measuring", action="store_true")
+    args = parser.parse_args()
+
+    from gpiozero import Device
+    from gpiozero.pins.mock import MockFactory, MockPWMPin
+    Device.pin_factory = MockFactory(pin_class=MockPWMPin)
+    from hardware import Hardware
+    from logWriter import LogWriter
+    from lcdService import LcdService
+
+    wheel = SpokedWheel(args.rpm[0], args.spokes, noise=args.noise, bounce_s=args.bounce, seed=1)
+    adcSim, lcdSim = simulate(wheel, args.adc, args.time_scale)
+    hw = Hardware()
+    logWriter = LogWriter(stream=open(os.devnull, "w"))
+    lcdService = None
+    if args.lcd:
+        lcdService = LcdService(hw.lcd)
+    driver = None
+    sampler = None
+    if args.source == "sampler":
+        from Sampler import Sampler
+        sampler = Sampler(hw.adc, 0)
+        source = SamplerSource(sampler)
+        sampler.start()
+    else:
+        source = createSource(hw, args.source)
+        if args.source != "adc":
+            pin = LDR_PIN if args.source == "digital" else IR_PIN
+            driver = PinDriver(wheel, Device.pin_factory.pin(pin), activeHigh=args.source == "digital").start()
+
+    print("source", args.source, "adc", args.adc, "spokes", args.spokes, "debounce", args.debounce, "s",
+          "noise", args.noise, "bounce", args.bounce, "s", "time scale", args.time_scale)
+    print(HEADER_FORMAT.format("rpm", "counted", "error", "displayed", "samples/s", "changes", "expected", "ignored"))
+    tracked = 0         # highest rpm of the sweep up to the first failed step
+    failed = False
+    try:
+        for rpm in args.rpm:
+            if lcdService is not None:
+                lcdService.set_line(0, "wheel {:.0f}".format(rpm))
+            result = measure(source, wheel, rpm, args.duration, args.debounce, hw.led, logWriter, lcdService)
+            print(RESULT_FORMAT.format(*result), flush=True)
+            if result[2] > args.tolerance:
+                failed = True
+            elif not failed:
+                tracked = rpm
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if driver is not None:
+            driver.stop()
+        if lcdService is not None:
+            lcdService.close()
+        logWriter.close()
+        print("max trackable rpm", tracked, "(tolerance {:.1%})".format(args.tolerance))
+        print(i2cBus.report())
+        if args.lcd:
+            print("LCD:\n" + lcdSim.lcd.text, "\nbusy violations", lcdSim.lcd.busyViolations)
+        hw.close()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : capture.py
+# Description : compact binary capture of ADC samples or edge events,
+#               memory-mapped replay
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import mmap
+import struct
+import threading
+from array import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+###########################################################################
+# file layout (little endian)
+#   header, 64 bytes:
+#       magic "RCAP", version, header size, record size,
+#       kind (ADC / EDGE), channel (ADC channel or GPIO pin), device (I2C address),
+#       changes_per_spoke, number_of_spokes, PWM frequency, PWM duty cycle,
+#       start time (monotonic ns)
+#   records, 12 bytes each:
+#       timestamp_ns int64, value uint16 (ADC code or edge level), channel uint8, flags uint8
+###########################################################################
+MAGIC = b"RCAP"
+VERSION = 1
+ADC = 0
+EDGE = 1
+HEADER = struct.Struct("<4sHHHBBHHHffq")
+HEADER_SIZE = 64
+RECORD = struct.Struct("<qHBB")
+if numpy is not None:
+    RECORD_DTYPE = numpy.dtype([("t_ns", "<i8"), ("value", "<u2"), ("channel", "u1"), ("flags", "u1")])
+
+
+###########################################################################
+# CaptureWriter
+#   records are packed into a preallocated buffer and written in blocks
+#   add() may be called from several threads (e.g. pin callbacks)
+###########################################################################
+class CaptureWriter(object):
+    def __init__(self, path, kind=ADC, channel=0, device=0, changes_per_spoke=2, number_of_spokes=5,
+                 pwm_frequency=0.0, pwm_dutycycle=0.0, start_ns=0, bufferRecords=4096):
+        self.file = open(path, "wb")
+        header = HEADER.pack(MAGIC, VERSION, HEADER_SIZE, RECORD.size, kind, channel, device,
+                             changes_per_spoke, number_of_spokes, pwm_frequency, pwm_dutycycle, start_ns)
+        self.file.write(header.ljust(HEADER_SIZE, b"\0"))
+        self.channel = channel
+        self.buffer = bytearray(RECORD.size * bufferRecords)
+        self.capacity = bufferRecords
+        self.used = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, timestamp_ns, value, channel=None, flags=0):
+        with self.lock:
+            RECORD.pack_into(self.buffer, self.used * RECORD.size, timestamp_ns, value,
+                             self.channel if channel is None else channel, flags)
+            self.used += 1
+            self.count += 1
+            if self.used == self.capacity:
+                self._flush()
+
+    def addMany(self, times, values, count=None, channel=None):
+        if count is None:
+            count = min(len(times), len(values))
+        for i in range(count):
+            self.add(times[i], values[i], channel)
+
+    def _flush(self):
+        used, self.used = self.used, 0
+        self.file.write(memoryview(self.buffer)[:used * RECORD.size])
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+###########################################################################
+# CaptureReader
+#   maps the file read-only; nothing is copied:
+#       records()          numpy structured array (or memoryview of the record bytes)
+#       times() / values() numpy views of one field (array copies without numpy)
+#       iteration          (timestamp_ns, value, channel, flags) tuples
+#   release the views before close()
+###########################################################################
+class CaptureReader(object):
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.version, headerSize, recordSize, self.kind, self.channel, self.device,
+         self.changes_per_spoke, self.number_of_spokes, self.pwm_frequency, self.pwm_dutycycle,
+         self.start_ns) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or recordSize != RECORD.size:
+            self.close()
+            raise ValueError("not a capture file: " + str(path))
+        self.headerSize = headerSize
+        self.count = (len(self.map) - headerSize) // recordSize
+
+    def __len__(self):
+        return self.count
+
+    def _bytes(self):
+        return memoryview(self.map)[self.headerSize:self.headerSize + self.count * RECORD.size]
+
+    def records(self):
+        if numpy is not None:
+            return numpy.frombuffer(self.map, RECORD_DTYPE, self.count, self.headerSize)
+        return self._bytes()
+
+    def times(self):
+        if numpy is not None:
+            return self.records()["t_ns"]
+        return array("q", (record[0] for record in self))
+
+    def values(self):
+        if numpy is not None:
+            return self.records()["value"]
+        return array("H", (record[1] for record in self))
+
+    def __iter__(self):
+        return RECORD.iter_unpack(self._bytes())
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : edgeCounter.py
+# Description : edge driven revolution counter: period, frequency and duty cycle
+#               from the edge timestamps of the pin backend (lgpio ticks)
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import threading
+from gpiozero import Device
+
+###########################################################################
+# EdgeCounter
+#   subscribes to both edges of one input pin; the pin backend calls
+#   _changed from its own thread with the kernel timestamp of the edge,
+#   so nothing runs (and no CPU is used) between two edges
+#
+#   a cycle starts with the transition to active (beam broken / LDR dark):
+#       period = time between two active edges
+#       onTime = time between the active edge and the following inactive edge
+#       duty   = onTime / period
+#
+#   works with every gpiozero pin factory, e.g. for tests:
+#       from gpiozero.pins.mock import MockFactory
+#       counter = EdgeCounter(23, pull_up=None, active_state=False, pin_factory=MockFactory())
+#       counter.pin.drive_low(); counter.pin.drive_high(); counter.pin.drive_low()
+###########################################################################
+class EdgeCounter(object):
+    def __init__(self, pin, pull_up=True, active_state=None, debounce_s=0, pin_factory=None, capture=None):
+        if pull_up is None:
+            if active_state is None:
+                raise ValueError("active_state must be set if pull_up is None")
+            pull = 'floating'
+        else:
+            pull = 'up' if pull_up else 'down'
+            if active_state is None:
+                active_state = not pull_up  # like gpiozero.Button: pull up means active low
+        if pin_factory is None:
+            if Device.pin_factory is None:
+                Device.pin_factory = Device._default_pin_factory()
+            pin_factory = Device.pin_factory
+        self.factory = pin_factory
+        self.activeLevel = bool(active_state)
+        self.debounce_s = debounce_s
+
+        self.active = None          # unknown until the first edge
+        self.edges = 0              # accepted edges
+        self.cycles = 0             # completed cycles (active -> active)
+        self.ignored = 0            # edges ignored by debounce_s
+        self.lastEdge = None        # ticks of the last accepted edge
+        self.lastOn = None          # ticks of the last active edge
+        self.lastOff = None         # ticks of the last inactive edge
+        self.period = 0.0           # seconds, of the last complete cycle
+        self.onTime = 0.0           # seconds active within the last complete cycle
+        self.cycleEvent = threading.Condition()
+        self.when_cycle = None      # optional callback(counter), called from the pin thread
+        self.when_edge = None       # optional callback(counter, ticks, active) for every accepted edge, from the pin thread
+        self.capture = capture      # optional CaptureWriter: records every accepted edge (level 1 = active)
+        self.pinNumber = pin
+
+        self.pin = pin_factory.pin(pin)
+        self.pin.function = 'input'
+        self.pin.pull = pull
+        self.pin.edges = 'both'
+        self.pin.when_changed = self._changed
+
+    @property
+    def frequency(self):
+        return 1 / self.period if self.period > 0 else 0.0
+
+    @property
+    def duty(self):
+        return self.onTime / self.period if self.period > 0 else 0.0
+
+    def _changed(self, ticks, state):
+        active = bool(state) == self.activeLevel
+        if active == self.active:
+            return  # repeated level: no edge
+        diff = self.factory.ticks_diff
+        if self.debounce_s and self.lastEdge is not None and diff(ticks, self.lastEdge) < self.debounce_s:
+            self.ignored += 1
+            return
+        self.active = active
+        self.lastEdge = ticks
+        self.edges += 1
+        if self.capture is not None:
+            self.capture.add(int(ticks * 1e9), active, self.pinNumber)
+        if self.when_edge is not None:
+            self.when_edge(self, ticks, active)
+        if not active:
+            self.lastOff = ticks
+            return
+        if self.lastOn is not None:
+            self.period = diff(ticks, self.lastOn)
+            self.onTime = diff(self.lastOff, self.lastOn) if self.lastOff is not None else 0.0
+            self.cycles += 1
+            with self.cycleEvent:
+                self.cycleEvent.notify_all()
+            if self.when_cycle is not None:
+                self.when_cycle(self)
+        self.lastOn = ticks
+
+    def wait_for_cycle(self, timeout=None):
+        """ block until the next complete cycle, return False on timeout """
+        with self.cycleEvent:
+            return self.cycleEvent.wait(timeout)
+
+    def close(self):
+        if self.pin is not None:
+            self.pin.when_changed = None
+            self.pin.close()
+            self.pin = None
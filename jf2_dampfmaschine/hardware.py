@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : hardware.py
+# Description : lazy hardware context: LEDs, buttons, ADC and LCD are
+#               created on first use and closed together at shutdown
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+
+###########################################################################
+# usage in a script, instead of creating the devices at import:
+#       hw = Hardware()
+#       ...
+#       hw.led.on()                     # LED(17) is created here
+#       value = hw.adc.analogRead(0)    # the ADC module is detected here
+#       ...
+#       hw.close()
+#   importing a script does not touch GPIO pins or the I2C bus any more;
+#   gpiozero and the drivers are only imported with their first device
+#
+#   in loops, bind the device to a local once: adc = hw.adc
+###########################################################################
+class Hardware(object):
+    def __init__(self, ledPin=17, pwmLedPin=27):
+        self.ledPin = ledPin
+        self.pwmLedPin = pwmLedPin
+        self._led = None
+        self._pwmLed = None
+        self._adc = None
+        self._lcd = None
+        self.buttons = {}   # pin -> Button
+        self.devices = []   # everything created, closed in reverse order
+
+    def _add(self, device):
+        self.devices.append(device)
+        return device
+
+    @property
+    def led(self):  # result LED, BCM numbering
+        if self._led is None:
+            from gpiozero import LED
+            self._led = self._add(LED(self.ledPin))
+        return self._led
+
+    @property
+    def pwmLed(self):   # calibration LED that shines on the LDR
+        if self._pwmLed is None:
+            from gpiozero import PWMLED
+            self._pwmLed = self._add(PWMLED(self.pwmLedPin))
+        return self._pwmLed
+
+    @property
+    def adc(self):  # PCF8591 or ADS7830; IOError if no module answers
+        if self._adc is None:
+            from ADCDevice import detectADC
+            adc = detectADC()
+            if adc is None:
+                raise IOError("I2C address 0x48 or 0x4b no found.")
+            self._adc = self._add(adc)
+        return self._adc
+
+    @property
+    def lcd(self):  # CharLCD1602 in fast mode, initialized
+        if self._lcd is None:
+            from LCD1602 import CharLCD1602
+            lcd = self._add(CharLCD1602(fast=True))
+            lcd.init_lcd()
+            self._lcd = lcd
+        return self._lcd
+
+    def button(self, pin, **kwargs):    # one Button per pin; kwargs only apply on first use
+        button = self.buttons.get(pin)
+        if button is None:
+            from gpiozero import Button
+            button = self.buttons[pin] = self._add(Button(pin, **kwargs))
+        return button
+
+    def close(self):
+        while self.devices:
+            self.devices.pop().close()
+        self._led = self._pwmLed = self._adc = self._lcd = None
+        self.buttons.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : i2cBus.py
+# Description : shared I2C bus registry: one smbus.SMBus per bus number,
+#               reference counted, transactions scheduled by client priority
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import threading
+from time import perf_counter_ns
+try:
+    import smbus
+except ImportError:     # no I2C on this machine: only simulated buses, see setBusFactory
+    smbus = None
+
+###########################################################################
+# usage in a driver, instead of smbus.SMBus(1):
+#       self.bus = i2cBus.openBus(1, "adc", i2cBus.SAMPLING)
+#       ... self.bus.read_byte_data(address, cmd) ...
+#       self.bus.close()
+#   every driver gets its own BusHandle (a client); all handles of one bus
+#   number share the same SMBus; the SMBus is closed with the last handle
+#
+#   scheduling: every call is one transaction; when the bus is busy, the
+#   waiting client with the highest priority gets it next, so sampling reads
+#   wait at most for one running transaction. Bulk writes (LCD) are sent as
+#   several small transactions, so reads can get in between.
+#
+#   setBusFactory(factory): buses opened from now on are factory(busnum)
+#   instead of smbus.SMBus(busnum), e.g. a simulated bus (simBus.py)
+###########################################################################
+SAMPLING = 0    # ADC reads: strict priority
+NORMAL = 1
+DISPLAY = 2     # LCD / port expander writes
+PRIORITIES = 3
+
+_buses = {}                     # bus number -> SharedBus
+_tracers = {}                   # bus number -> i2cTrace.TracingSMBus, see startTrace
+_busFactory = None              # see setBusFactory; None: smbus.SMBus
+_registryLock = threading.Lock()
+
+
+###########################################################################
+# PriorityLock
+#   like threading.RLock, but a release hands the lock to the waiting
+#   thread of the highest priority (lowest number)
+###########################################################################
+class PriorityLock(object):
+    def __init__(self):
+        self.cond = threading.Condition(threading.Lock())
+        self.owner = None
+        self.depth = 0
+        self.waiting = [0] * PRIORITIES
+
+    def acquire(self, priority=NORMAL):
+        me = threading.get_ident()
+        with self.cond:
+            if self.owner == me:
+                self.depth += 1
+                return
+            waiting = self.waiting
+            waiting[priority] += 1
+            while self.owner is not None or any(waiting[:priority]):
+                self.cond.wait()
+            waiting[priority] -= 1
+            self.owner = me
+            self.depth = 1
+
+    def release(self):
+        with self.cond:
+            self.depth -= 1
+            if self.depth == 0:
+                self.owner = None
+                self.cond.notify_all()
+
+
+class SharedBus(object):
+    def __init__(self, busnum):
+        self.busnum = busnum
+        if _busFactory is not None:
+            self.bus = _busFactory(busnum)
+        elif smbus is not None:
+            self.bus = smbus.SMBus(busnum)
+        else:
+            raise ImportError("no module smbus: install python3-smbus, or use i2cBus.setBusFactory for a simulated bus")
+        tracer = _tracers.get(busnum)
+        if tracer is not None:          # traced: the handles call the TracingSMBus
+            tracer.bus = self.bus
+            self.bus = tracer
+        self.lock = PriorityLock()      # one transaction at a time
+        self.refs = 0
+        self.clients = []               # open BusHandles, for the statistics
+        self.start_ns = perf_counter_ns()
+
+
+class BusHandle(object):
+    # same methods as smbus.SMBus; every call is one scheduled transaction
+    def __init__(self, shared, name, priority):
+        self.shared = shared
+        self.bus = shared.bus
+        self.lock = shared.lock
+        self.name = name
+        self.priority = priority
+        self.transactions = 0
+        self.busy_ns = 0        # time holding the bus
+        self.wait_ns = 0        # time queued for the bus
+        self.maxWait_ns = 0
+        self.closed = False
+
+    def _run(self, method, *args):
+        lock = self.lock
+        t0 = perf_counter_ns()
+        lock.acquire(self.priority)
+        t1 = perf_counter_ns()
+        try:
+            return method(*args)
+        finally:
+            t2 = perf_counter_ns()
+            lock.release()
+            wait = t1 - t0
+            self.transactions += 1
+            self.wait_ns += wait
+            self.busy_ns += t2 - t1
+            if wait > self.maxWait_ns:
+                self.maxWait_ns = wait
+
+    def read_byte(self, addr):
+        return self._run(self.bus.read_byte, addr)
+
+    def write_byte(self, addr, value):
+        return self._run(self.bus.write_byte, addr, value)
+
+    def read_byte_data(self, addr, cmd):
+        return self._run(self.bus.read_byte_data, addr, cmd)
+
+    def write_byte_data(self, addr, cmd, value):
+        return self._run(self.bus.write_byte_data, addr, cmd, value)
+
+    def read_word_data(self, addr, cmd):
+        return self._run(self.bus.read_word_data, addr, cmd)
+
+    def write_word_data(self, addr, cmd, value):
+        return self._run(self.bus.write_word_data, addr, cmd, value)
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        return self._run(self.bus.read_i2c_block_data, addr, cmd, length)
+
+    def write_i2c_block_data(self, addr, cmd, values):
+        return self._run(self.bus.write_i2c_block_data, addr, cmd, values)
+
+    def stats(self):
+        """ (name, transactions, bus occupancy 0..1, mean queueing delay s, max queueing delay s) """
+        elapsed = perf_counter_ns() - self.shared.start_ns
+        return (self.name, self.transactions,
+                self.busy_ns / elapsed if elapsed > 0 else 0.0,
+                self.wait_ns / self.transactions / 1e9 if self.transactions else 0.0,
+                self.maxWait_ns / 1e9)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            _release(self.shared, self)
+
+
+def setBusFactory(factory):
+    """ factory(busnum) creates the SMBus of every bus opened from now on; None: smbus.SMBus again """
+    global _busFactory
+    _busFactory = factory
+
+def openBus(busnum=1, name="client", priority=NORMAL):
+    with _registryLock:
+        shared = _buses.get(busnum)
+        if shared is None:
+            shared = _buses[busnum] = SharedBus(busnum)
+        shared.refs += 1
+        handle = BusHandle(shared, name, priority)
+        shared.clients.append(handle)
+        return handle
+
+def _release(shared, handle):
+    with _registryLock:
+        shared.clients.remove(handle)   # closed clients leave the statistics
+        shared.refs -= 1
+        if shared.refs == 0:
+            shared.bus.close()
+            del _buses[shared.busnum]
+
+def clients():
+    """ (bus number, BusHandle) of all clients of the open buses """
+    with _registryLock:
+        return [(shared.busnum, client) for shared in _buses.values() for client in shared.clients]
+
+###########################################################################
+# tracing, see i2cTrace.py
+#   startTrace wraps the SMBus of the bus number into a TracingSMBus, now
+#   if it is open and whenever it is opened again; the counters and the
+#   trace file last until stopTrace
+###########################################################################
+def _setBus(shared, bus):
+    shared.lock.acquire()       # not in the middle of a transaction
+    try:
+        shared.bus = bus
+        for client in shared.clients:
+            client.bus = bus
+    finally:
+        shared.lock.release()
+
+def startTrace(busnum=1, path=None):
+    """ trace all transactions on the bus, optionally into the binary trace file path; returns the TracingSMBus """
+    from i2cTrace import TracingSMBus
+    with _registryLock:
+        tracer = _tracers.get(busnum)
+        if tracer is None:
+            tracer = _tracers[busnum] = TracingSMBus(None, path, busnum)
+            shared = _buses.get(busnum)
+            if shared is not None:
+                tracer.bus = shared.bus
+                _setBus(shared, tracer)
+        return tracer
+
+def stopTrace(busnum=1):
+    """ unwraps the bus and closes the trace file; returns the TracingSMBus with its statistics """
+    with _registryLock:
+        tracer = _tracers.pop(busnum, None)
+        if tracer is None:
+            return None
+        shared = _buses.get(busnum)
+        if shared is not None:
+            _setBus(shared, tracer.bus)
+        tracer.closeTrace()
+        return tracer
+
+def traceReport():
+    """ per address statistics of the traced buses """
+    with _registryLock:
+        tracers = sorted(_tracers.items())
+    return "\n".join("i2c-{} trace, {} transactions\n{}".format(busnum, tracer.count, tracer.stats.report())
+                     for busnum, tracer in tracers)
+
+def report():
+    """ statistics of all clients, one line each """
+    lines = []
+    for busnum, client in clients():
+        if client.transactions == 0:
+            continue
+        name, transactions, occupancy, meanWait, maxWait = client.stats()
+        lines.append("i2c-{} {:<10} transactions {:>8} occupancy {:5.1f}% wait mean {:7.3f} ms max {:7.3f} ms".format(
+            busnum, name, transactions, 100 * occupancy, 1000 * meanWait, 1000 * maxWait))
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : i2cDiscovery.py
+# Description : in-process I2C device discovery for the known modules,
+#               with an address cache for fast startup
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import json
+import os
+import i2cBus
+
+###########################################################################
+# only the candidate addresses of the known drivers are probed,
+# instead of scanning the whole bus with i2cdetect
+#
+# the found address of each kind is kept in CACHE_PATH; on the next start
+# the cached address is checked with one probe, the other candidates are
+# only probed if it does not answer any more
+###########################################################################
+CANDIDATES = {
+    "adc": [(0x48, "PCF8591"), (0x4b, "ADS7830")],
+    "lcd": [(0x27, "PCF8574"), (0x3f, "PCF8574A")],
+}
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "raspi_i2c.json")
+
+def probe(bus, address):
+    """ True if a device acknowledges a read at address """
+    try:
+        bus.read_byte(address)
+        return True
+    except OSError:
+        return False
+
+def _loadCache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}     # e.g. null or [] in a corrupt file
+
+def _saveCache(path, cache):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass    # no cache: probe all candidates next time
+
+def find(kind, busnum=1, cachePath=None):
+    """ address of the first answering candidate of kind ("adc", "lcd"), None if none answers """
+    if cachePath is None:
+        cachePath = CACHE_PATH
+    cache = _loadCache(cachePath)
+    key = "{}/{}".format(busnum, kind)
+    cached = cache.get(key)
+    if type(cached) is not int or cached not in [address for address, name in CANDIDATES[kind]]:
+        cached = None       # no address find() wrote, e.g. an edited or corrupt cache file
+    bus = i2cBus.openBus(busnum, "discovery")
+    try:
+        if cached is not None and probe(bus, cached):
+            return cached
+        for address, name in CANDIDATES[kind]:
+            if address != cached and probe(bus, address):
+                cache[key] = address
+                _saveCache(cachePath, cache)
+                return address
+        if key in cache:
+            del cache[key]
+            _saveCache(cachePath, cache)
+        return None
+    finally:
+        bus.close()
+
+def scan(busnum=1):
+    """ all answering candidate addresses: [(address, name), ...] """
+    bus = i2cBus.openBus(busnum, "discovery")
+    try:
+        return [(address, name) for kind in CANDIDATES for address, name in CANDIDATES[kind] if probe(bus, address)]
+    finally:
+        bus.close()
+
+
+if __name__ == '__main__':
+    for address, name in scan():
+        print("0x%x %s" % (address, name))
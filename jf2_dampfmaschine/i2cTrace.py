@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : i2cTrace.py
+# Description : tracing SMBus: transactions, bytes and latency per I2C
+#               address, optional compact binary trace file
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import struct
+from time import monotonic_ns
+from stageProfiler import Histogram
+
+###########################################################################
+# usage: before the drivers are created (or any time later, open buses
+# are wrapped too)
+#       i2cBus.startTrace(1, "bus.trace")   # path optional
+#       ...
+#       print(i2cBus.traceReport())
+#       i2cBus.stopTrace(1)
+#   every driver (ADCDevice, PCF8574_I2C, CharLCD1602) gets its bus from
+#   i2cBus, so all their transactions go through the TracingSMBus
+#   standalone: bus = TracingSMBus(smbus.SMBus(1)) ... bus.stats.report()
+#
+#   bytes: payload on the wire without the address byte, the command
+#   byte counts as written (read_byte_data: 1 written, 1 read); a failed
+#   call counts no bytes
+#   latency: the call into smbus only, without the queueing of i2cBus
+###########################################################################
+READ_BYTE = 1
+WRITE_BYTE = 2
+READ_BYTE_DATA = 3
+WRITE_BYTE_DATA = 4
+READ_WORD_DATA = 5
+WRITE_WORD_DATA = 6
+READ_BLOCK = 7
+WRITE_BLOCK = 8
+ERROR = 0x80        # flag in op: the call raised (e.g. no acknowledge)
+OPS = {READ_BYTE: "read_byte", WRITE_BYTE: "write_byte", READ_BYTE_DATA: "read_byte_data",
+       WRITE_BYTE_DATA: "write_byte_data", READ_WORD_DATA: "read_word_data", WRITE_WORD_DATA: "write_word_data",
+       READ_BLOCK: "read_i2c_block_data", WRITE_BLOCK: "write_i2c_block_data"}
+
+###########################################################################
+# trace file layout (little endian)
+#   header, 32 bytes: magic "I2CT", version, header size, record size,
+#       bus number, start time (monotonic ns)
+#   records, 16 bytes each:
+#       start ns since the start time int64, duration ns uint32,
+#       op uint8 (| ERROR), address uint8, command uint8 (write_byte: the
+#       value), length uint8 (bytes written + read)
+###########################################################################
+MAGIC = b"I2CT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHq")
+HEADER_SIZE = 32
+RECORD = struct.Struct("<qIBBBB")
+
+
+###########################################################################
+# AddressStats / TraceStats
+#   the counters of one address; TraceStats collects them for a bus,
+#   live from TracingSMBus or afterwards from a trace file
+###########################################################################
+class AddressStats(object):
+    def __init__(self, address):
+        self.address = address
+        self.calls = 0
+        self.errors = 0
+        self.bytesRead = 0
+        self.bytesWritten = 0
+        self.busy_ns = 0
+        self.ops = {}           # op -> calls
+        self.latency = Histogram()
+
+
+class TraceStats(object):
+    def __init__(self):
+        self.addresses = {}     # address -> AddressStats
+        self.start_ns = monotonic_ns()
+
+    def add(self, op, address, read, written, duration):
+        stats = self.addresses.get(address)
+        if stats is None:
+            stats = self.addresses[address] = AddressStats(address)
+        stats.calls += 1
+        if op & ERROR:
+            stats.errors += 1
+        stats.bytesRead += read
+        stats.bytesWritten += written
+        stats.busy_ns += duration
+        stats.ops[op & ~ERROR] = stats.ops.get(op & ~ERROR, 0) + 1
+        stats.latency.record(duration)
+
+    def report(self, elapsed_ns=None):
+        """ one line per address, busiest first: calls, bytes, share of the bus time, latency """
+        from i2cDiscovery import CANDIDATES
+        names = dict(device for devices in CANDIDATES.values() for device in devices)
+        if elapsed_ns is None:
+            elapsed_ns = monotonic_ns() - self.start_ns
+        lines = []
+        for stats in sorted(self.addresses.values(), key=lambda stats: -stats.busy_ns):
+            latency = stats.latency
+            lines.append("0x{:02x} {:<9} calls {:>8} errors {:>4} read {:>8} B written {:>8} B bus {:5.1f}%"
+                         " latency p50 {:7.1f} p99 {:7.1f} max {:7.1f} us".format(
+                stats.address, names.get(stats.address, ""), stats.calls, stats.errors,
+                stats.bytesRead, stats.bytesWritten, 100 * stats.busy_ns / elapsed_ns if elapsed_ns > 0 else 0.0,
+                latency.percentile(50) / 1000, latency.percentile(99) / 1000, latency.max / 1000))
+            lines.append("     " + ", ".join("{} {}".format(OPS.get(op, op), calls) for op, calls in sorted(stats.ops.items())))
+        return "\n".join(lines)
+
+
+###########################################################################
+# TracingSMBus
+#   wraps an smbus.SMBus (same methods); every call is timed and counted,
+#   and written to the trace file if one is given
+#   close() closes the wrapped bus, closeTrace() the trace file; i2cBus
+#   keeps one TracingSMBus per bus number and sets bus when it (re)opens
+#   not thread safe by itself: i2cBus calls it under the bus lock
+###########################################################################
+class TracingSMBus(object):
+    def __init__(self, bus=None, path=None, busnum=1, bufferRecords=4096):
+        self.bus = bus
+        self.stats = TraceStats()
+        self.file = None
+        self.count = 0
+        if path is not None:
+            self.file = open(path, "wb")
+            header = HEADER.pack(MAGIC, VERSION, HEADER_SIZE, RECORD.size, busnum, self.stats.start_ns)
+            self.file.write(header.ljust(HEADER_SIZE, b"\0"))
+            self.buffer = bytearray(RECORD.size * bufferRecords)
+            self.capacity = bufferRecords
+            self.used = 0
+
+    def _call(self, op, address, cmd, read, written, method, *args):
+        start = monotonic_ns()
+        try:
+            result = method(*args)
+        except OSError:
+            op |= ERROR
+            raise
+        finally:
+            duration = monotonic_ns() - start
+            if op & ERROR:
+                read = written = 0      # no bytes are known to be transferred
+            self.stats.add(op, address, read, written, duration)
+            self.count += 1
+            if self.file is not None:
+                RECORD.pack_into(self.buffer, self.used * RECORD.size, start - self.stats.start_ns,
+                                 min(duration, 0xffffffff), op, address, cmd, read + written)
+                self.used += 1
+                if self.used == self.capacity:
+                    self._flush()
+        return result
+
+    def read_byte(self, addr):
+        return self._call(READ_BYTE, addr, 0, 1, 0, self.bus.read_byte, addr)
+
+    def write_byte(self, addr, value):
+        return self._call(WRITE_BYTE, addr, value, 0, 1, self.bus.write_byte, addr, value)
+
+    def read_byte_data(self, addr, cmd):
+        return self._call(READ_BYTE_DATA, addr, cmd, 1, 1, self.bus.read_byte_data, addr, cmd)
+
+    def write_byte_data(self, addr, cmd, value):
+        return self._call(WRITE_BYTE_DATA, addr, cmd, 0, 2, self.bus.write_byte_data, addr, cmd, value)
+
+    def read_word_data(self, addr, cmd):
+        return self._call(READ_WORD_DATA, addr, cmd, 2, 1, self.bus.read_word_data, addr, cmd)
+
+    def write_word_data(self, addr, cmd, value):
+        return self._call(WRITE_WORD_DATA, addr, cmd, 0, 3, self.bus.write_word_data, addr, cmd, value)
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        return self._call(READ_BLOCK, addr, cmd, length, 1, self.bus.read_i2c_block_data, addr, cmd, length)
+
+    def write_i2c_block_data(self, addr, cmd, values):
+        return self._call(WRITE_BLOCK, addr, cmd, 0, 1 + len(values), self.bus.write_i2c_block_data, addr, cmd, values)
+
+    def _flush(self):
+        used, self.used = self.used, 0
+        self.file.write(memoryview(self.buffer)[:used * RECORD.size])
+
+    def close(self):
+        if self.bus is not None:
+            self.bus.close()
+            self.bus = None
+
+    def closeTrace(self):
+        if self.file is not None:
+            self._flush()
+            self.file.close()
+            self.file = None
+
+
+###########################################################################
+# trace file reader
+###########################################################################
+def readTrace(path):
+    """ (header dict, iterator of (start_ns, duration_ns, op, address, command, length)) """
+    file = open(path, "rb")
+    magic, version, headerSize, recordSize, busnum, start_ns = HEADER.unpack(file.read(HEADER_SIZE)[:HEADER.size])
+    if magic != MAGIC or recordSize != RECORD.size:
+        file.close()
+        raise ValueError(path + ": no I2C trace file")
+    def records():
+        with file:
+            while True:
+                block = file.read(RECORD.size * 4096)
+                if not block:
+                    return
+                yield from RECORD.iter_unpack(block[:len(block) - len(block) % RECORD.size])
+    return dict(version=version, busnum=busnum, start_ns=start_ns), records()
+
+def traceStats(path):
+    """ TraceStats and the traced time (ns) of a trace file """
+    header, records = readTrace(path)
+    stats = TraceStats()
+    last = 0
+    for start, duration, op, address, cmd, length in records:
+        code = op & ~ERROR
+        if op & ERROR:
+            read = 0            # failed calls are recorded with length 0
+        else:
+            read = length - 1 if code in (READ_BYTE_DATA, READ_WORD_DATA, READ_BLOCK) else length if code == READ_BYTE else 0
+        stats.add(op, address, read, length - read, duration)
+        last = start + duration
+    return stats, last
+
+
+if __name__ == '__main__':   # Program entrance
+    import argparse
+    parser  = argparse.ArgumentParser()
+    parser.add_argument("trace", help="trace file, see i2cBus.startTrace / jf2_dampfmaschine.py --trace")
+    parser.add_argument("-l", "--list", help="print every transaction", action="store_true")
+    args = parser.parse_args()
+    if args.list:
+        header, records = readTrace(args.trace)
+        for start, duration, op, address, cmd, length in records:
+            print("{:12.6f} 0x{:02x} {:<20} cmd 0x{:02x} {:>3} B {:8.1f} us{}".format(
+                start / 1e9, address, OPS.get(op & ~ERROR, op), cmd, length, duration / 1000, " error" if op & ERROR else ""))
+    stats, elapsed = traceStats(args.trace)
+    print(stats.report(elapsed))
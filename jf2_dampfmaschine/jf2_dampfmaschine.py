@@ -6,99 +6,205 @@
 # modification: 2023/05/11
 ########################################################################
 import time
-from ADCDevice import *
+import i2cBus
+from Sampler import Sampler
+from rpmEstimator import RpmEstimator
+from revolutionEngine import RevolutionCounter, AdcSource, SamplerSource
+from logWriter import LogWriter
+from statsSegment import StatsWriter, LoopTimer, DEFAULT_NAME as STATS_NAME
+from metricsServer import MetricsServer
+from stageProfiler import StageProfiler, installSignals
+import capture
 from timeit import default_timer as timer
-from gpiozero import LED
+from hardware import Hardware
 
-adc = ADCDevice() # Define an ADCDevice class object
+hw = Hardware()     # LED and ADC are created on first use, see hardware.py
 start = timer()
 globalstart = timer() # does not get reset
-counter = 0
-led = LED(17)       # define LED pin according to BCM Numbering
-lastled = 0
 threshold_ignore_change_s = 0.005
-lastchangetime = 0
-changes = 0
-number_ignored_events = 0
 
 changes_per_spoke = 2
 number_of_spokes = 5
+rpm_window_s = 2    # at high speed rps/rpm are computed from the changes of the last rpm_window_s seconds,
+                    # at low speed from the periods of the last spokes (see RpmEstimator)
+rpmEstimator = RpmEstimator(rpm_window_s, changes_per_spoke, number_of_spokes)
+revolution = RevolutionCounter(threshold_ignore_change_s, estimator=rpmEstimator)  # changes, ignored events, samples
+
+# output goes through the LogWriter thread: the loops only enqueue (format, values...)
+logWriter = None
+LOOP_FORMAT = "rps {0:.2f} rpm {1:.2f} {2} voltage {3:.2f}"
+SAMPLER_FORMAT = "rps {0:.2f} rpm {1:.2f} {2} voltage {3:.2f} batch {4} sampling hz {5:.0f} overruns {6}"
+IGNORED_FORMAT = "change ignored: lastled was {0}; #changes:  {1} at time {2}"
+
+captureWriter = None    # CaptureWriter: records the raw ADC values for offline replay
+statsWriter = None      # StatsWriter: live statistics for statsSegment.py viewers
+metricsServer = None    # MetricsServer: Prometheus metrics on localhost
+loopTimer = LoopTimer() # iteration times of loop / samplerLoop
+
+# stages of one loop iteration, see stageProfiler.py; read: the I2C read of the ADC (loop)
+# or draining the sampler ring (samplerLoop); logic: threshold, debounce and rpm
+LOOP_STAGES = ("read", "logic", "led", "capture", "log", "stats")
+READ, LOGIC, LED, CAPTURE, LOG, STATS = range(len(LOOP_STAGES))
+profiler = StageProfiler(LOOP_STAGES)   # disabled: --profile or kill -USR2 enable it
 
 def setup():
-    global adc
-    if(adc.detectI2C(0x48)): # Detect the pcf8591.
-        adc = PCF8591()
-    elif(adc.detectI2C(0x4b)): # Detect the ads7830
-        adc = ADS7830()
-    else:
+    global logWriter
+    if logWriter is None:
+        logWriter = LogWriter()
+    try:
+        hw.adc  # detects the pcf8591 or ads7830, address cached by i2cDiscovery
+    except IOError:
         print("No correct I2C address found, \n"
         "Please use command 'i2cdetect -y 1' to check the I2C address! \n"
         "Program Exit. \n");
         exit(-1)
         
+def changed(revolution, now):   # registered change: the LED shows the state
+    profiler.mark(LOGIC)
+    if revolution.state:
+        hw.led.on()
+    else:
+        hw.led.off()
+    profiler.mark(LED)
+
+def ignored(revolution, now):
+    logWriter.log((IGNORED_FORMAT, int(revolution.state), revolution.changes, now - start), True)
+
+revolution.when_change = changed
+revolution.when_ignored = ignored
+
 def loop():
+    source = AdcSource(hw.adc, 0)
+    loopTimer.start()       # not the setup time since the import
     while True:
-        global counter, lastled, changes, threshold_ignore_change_s, number_ignored_events, lastchangetime, start
+        profiler.start()
+        before = revolution.changes
+        source.read()              # read the ADC value of channel 0
+        profiler.mark(READ)
+        source.feed(revolution)
+        now = source.timestamp
+        rps = rpmEstimator.rps(now)
+        profiler.mark(LOGIC)
+        if captureWriter is not None:
+            captureWriter.add(int(now * 1e9), source.value)
+            profiler.mark(CAPTURE)
+        logWriter.log((LOOP_FORMAT, rps, rps * 60, rpmEstimator.mode, source.value / 255.0 * 3.3), revolution.changes != before)
+        profiler.mark(LOG)
+        loopTimer.tick()
+        if statsWriter is not None and now >= statsWriter.due:
+            statsWriter.publishCounter(revolution, now, 0, loopTimer)
+        profiler.mark(STATS)
+        profiler.end()
+        #time.sleep(0.1)
 
-        if (timer() - start > 5):
-            start = timer()
-            changes = 0
-        
-        diff = timer() - start
-        hzChanges = changes / diff
-        rps = hzChanges / (changes_per_spoke*number_of_spokes)
-        rpm = rps * 60
+###########################################################################
+# sampler loop
+#   the ADC is read by a background Sampler thread; this loop handles the
+#   samples in batches, so printing does not slow down the sampling
+#   realtimeCpu: sample in a child process pinned to this CPU instead
+###########################################################################
+def samplerLoop(batchSize=1024, realtimeCpu=None, fifo=False):
+    global start
+    if realtimeCpu is None:
+        sampler = Sampler(hw.adc, 0)
+    else:
+        # acquisition in its own process on realtimeCpu, see rtSampler.py
+        from rtSampler import RtSampler
+        sampler = RtSampler(0, cpu=realtimeCpu, fifo=fifo)
+    source = SamplerSource(sampler, batchSize)
+    start = time.monotonic()    # same clock as the sample timestamps
+    if metricsServer is not None:
+        metricsServer.sampler = sampler
+    sampler.start()
+    loopTimer.start()
+    try:
+        while True:
+            profiler.start()
+            n = source.read()
+            if n == 0:
+                time.sleep(0.001)
+                continue
+            profiler.mark(READ)
+            source.feed(revolution)
+            rps = rpmEstimator.rps(source.timestamp)
+            profiler.mark(LOGIC)
+            if captureWriter is not None:
+                captureWriter.addMany(source.times, source.values, n)
+                profiler.mark(CAPTURE)
 
-        counter += 1
-        value = adc.analogRead(0)    # read the ADC value of channel 0
-        voltage = value / 255.0 * 3.3  # calculate the voltage value
-        print("rps", "{:.2f}".format(rps), "rpm", "{:.2f}".format(rpm), "voltage", "{:.2f}".format(voltage))
-        if (voltage >= (3.3/2)):
-            if (lastled == 0):
-                if (timer() - lastchangetime >= threshold_ignore_change_s):
-                    changes += 1
-                    lastchangetime = timer()
-                    diff = timer() - start
-                    hzChanges = changes / diff
-                    rps = hzChanges / (changes_per_spoke*number_of_spokes)
-                    rpm = rps * 60
-                    #print("change registered: lastled was 0, now 1; #changes: ", changes, "at time", diff, "and hzChanges", hzChanges, "rps", rps, "rpm", rpm)
-                    lastled = 1
-                    led.on()
-                else:
-                    number_ignored_events += 1
-                    print("change ignored: lastled was 0; #changes: ", changes, "at time", timer() - start)
-        else:
-            if (lastled == 1):
-                if (timer() - lastchangetime >= threshold_ignore_change_s):
-                    changes += 1
-                    lastchangetime = timer()
-                    diff = timer() - start
-                    hzChanges = changes / diff
-                    rps = hzChanges / (changes_per_spoke*number_of_spokes)
-                    rpm = rps * 60
-                    #print("change registered: lastled was 1, now 0; #changes: ", changes, "at time", diff, "and hzChanges", hzChanges, "rps", rps, "rpm", rpm)
-                    lastled = 0
-                    led.off()
-                else:
-                    number_ignored_events += 1
-                    print("change ignored: lastled was 1; #changes: ", changes, "at time", timer() - start)
-        #print ('ADC Value : %d, Voltage : %.2f'%(value,voltage), "at time", timer() - start)
-        #time.sleep(0.1)
+            logWriter.log((SAMPLER_FORMAT, rps, rps * 60, rpmEstimator.mode, source.value / 255.0 * 3.3, n, sampler.samplesPerSecond, sampler.overruns))
+            profiler.mark(LOG)
+            loopTimer.tick()
+            if statsWriter is not None and source.timestamp >= statsWriter.due:
+                statsWriter.publishCounter(revolution, source.timestamp, sampler.overruns, loopTimer)
+            profiler.mark(STATS)
+            profiler.end()
+    finally:
+        sampler.stop()
 
 def destroy():
-    adc.close()
+    hw.close()  # all devices created so far
     
 if __name__ == '__main__':   # Program entrance
     print ('Program is starting ... ')
+    import argparse
+    parser  = argparse.ArgumentParser()
+    parser.add_argument("-s", "--sampler", help="sample the ADC in a background thread; default: sample in the main loop", action="store_true")
+    parser.add_argument("-n", "--log-every", help="log only every N-th sample (changes are always logged); default: 1", type=int, default=1)
+    parser.add_argument("-e", "--edges-only", help="log only registered changes; default: log every sample", action="store_true")
+    parser.add_argument("-c", "--capture", help="record the raw ADC values into this capture file")
+    parser.add_argument("-R", "--realtime", help="sample in a child process pinned to this CPU (implies --sampler)", type=int, metavar="CPU")
+    parser.add_argument("-f", "--fifo", help="with --realtime: SCHED_FIFO priority and mlockall (needs root)", action="store_true")
+    parser.add_argument("-S", "--stats", help="publish live statistics into this shared memory segment, see statsSegment.py; default name " + STATS_NAME,
+                        nargs="?", const=STATS_NAME, metavar="NAME")
+    parser.add_argument("-m", "--metrics", help="serve Prometheus metrics on this port of 127.0.0.1, see metricsServer.py", type=int, metavar="PORT")
+    parser.add_argument("-T", "--trace", help="count the I2C transactions per device, see i2cTrace.py; with FILE: also write a binary trace",
+                        nargs="?", const="", metavar="FILE")
+    parser.add_argument("-p", "--profile", help="time the stages of every loop from the start; default: off, kill -USR2 toggles, kill -USR1 reports",
+                        action="store_true")
+    args = parser.parse_args()
+    logWriter = LogWriter(args.log_every, args.edges_only)
+    installSignals(profiler)
+    if args.profile:
+        profiler.enable()
+    if args.trace is not None:
+        i2cBus.startTrace(1, args.trace or None)    # before setup: the ADC detection is traced too
     try:
         setup()
-        loop()
+        if args.stats:
+            statsWriter = StatsWriter(args.stats)
+        if args.metrics:
+            metricsServer = MetricsServer(revolution, loopTimer=loopTimer, port=args.metrics).start()
+        if args.capture:
+            captureWriter = capture.CaptureWriter(args.capture, capture.ADC, 0, hw.adc.address, changes_per_spoke, number_of_spokes)
+        if args.realtime is not None:
+            samplerLoop(realtimeCpu=args.realtime, fifo=args.fifo)
+        elif args.sampler:
+            samplerLoop()
+        else:
+            loop()
     except KeyboardInterrupt: # Press ctrl-c to end the program.
+        print(i2cBus.report())  # before destroy: closing the last client closes the bus
+        if args.trace is not None:
+            print(i2cBus.traceReport())
         destroy()
+        logWriter.close()
+        if captureWriter is not None:
+            captureWriter.close()
+            print("captured", captureWriter.count, "samples into", args.capture)
+        if statsWriter is not None:
+            statsWriter.close()
+        if metricsServer is not None:
+            metricsServer.close()
+        if profiler.iterations:
+            print(profiler.report())
         print("Ending program")
         end = timer()
         diff = end - globalstart
-        hzSampling = counter / diff
-        print("after diff", diff, "counter is at", counter, "with hz", hzSampling, "ignored events", number_ignored_events)
+        hzSampling = revolution.samples / diff
+        print("after diff", diff, "counter is at", revolution.samples, "with hz", hzSampling, "ignored events", revolution.ignored,
+            "log lines", logWriter.written, "dropped", logWriter.dropped)
+    finally:
+        if args.trace is not None:
+            i2cBus.stopTrace(1)     # flushes the buffered records into the trace file on any exit
         
\ No newline at end of file
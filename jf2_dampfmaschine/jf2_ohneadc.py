@@ -12,8 +12,8 @@ from timeit import default_timer as timer
 # for calibration tests: shine the LDR with a PWM LED
 #   with specified  frequency and duty cycle
 ###########################################################################
-from gpiozero import PWMLED
-pwmLed = PWMLED(27)
+from hardware import Hardware
+hw = Hardware()     # LEDs, buttons, ADC and LCD are created on first use, see hardware.py
 '''
 start or restart the pwmLed with specified params.
 :param int frequency:
@@ -24,6 +24,7 @@ start or restart the pwmLed with specified params.
         Exampel: 0.1 specifies ON for 10% (and OFF for 90%) of the cycle: "short pulse"
 '''
 def startPwmLed(frequency=1, dutyCycle=0.1):  # blinks very slow (1/sec); short ON (10%), long OFF (90%)
+    pwmLed = hw.pwmLed
     pwmLed.on()     # must turn on before setting value!
     pwmLed.frequency = frequency
     pwmLed.value = dutyCycle
@@ -34,7 +35,6 @@ def startPwmLed(frequency=1, dutyCycle=0.1):  # blinks very slow (1/sec); short
 # Button controlled by LDR + R-Bridge
 #   instead of ADC
 ###########################################################################
-from gpiozero import Button
 #button = Button(18, bounce_time=5) # does not work for button.is_pressed
 #button = Button(18)
 #button = Button(18, bounce_time=0.005)
@@ -46,126 +46,53 @@ from gpiozero import Button
 ###########################################################################
 #import smbus
 def initLCD() :
-    from LCD1602 import CharLCD1602
-    lcd1602 = CharLCD1602() 
-    lcd1602.init_lcd()
+    lcd1602 = hw.lcd
     lcd1602.clear()
     lcd1602.write(0, 0, "TEST" )
     lcd1602.write(0, 1, "EINS" )
     return lcd1602
 #initLCD()
 
+# LcdService around the LCD: the loops only hand over text, rendering runs in its own thread
+from lcdService import LcdService
+from revolutionEngine import CYCLE_STAGES, RevolutionCounter, AdcSource, createSource, cycleLoop
+lcdService = None
+LCD_CYCLE_FORMAT = "{:>6.1f}ms {:>5.1f}Hz"
+
+from stageProfiler import StageProfiler, installSignals
+profiler = StageProfiler(CYCLE_STAGES)  # stages of the test loop; --profile or kill -USR2 enable it
+
 
 ###########################################################################
 # the test loop
-#   analogRead of LDR voltage (8bit), or digital  is_pressed, or wait_for_press/release
-#   handle HIGH/LOW value
-#   turn led ON/OFF
-#   prints ADC sample time and value
+#   analogRead of LDR voltage (8bit), or digital wait_for_press/release
+#   prints every cycle, see revolutionEngine.cycleLoop
 ###########################################################################
+def showCycle(counter):
+    if lcdService is not None:
+        lcdService.set_line(1, LCD_CYCLE_FORMAT.format(1000 * counter.period, 1/counter.period))
+
 def testLoop(verbose=False, digital=False, infrared=False):
     print("testloop:", "digital=" + str(digital), "verbose=" + str(verbose))
-
-    startTest = timer()    
-    startRPS = 0
-    timeRPS = 0
-    countON = 0
-    countOFF = 0
-    timeON = 0
-    timeOFF = 0
-
-    led.off()
-    loops = 0
-    while True:
-        loops += 1 
-
-        # read the ADC (voltage) of channel 0
-        startADC = timer()
-        if (digital or infrared):
-            #voltage = 3.3 if button.is_pressed else 0
-            if (led.is_lit):
-                timeOFF = timer()
-                button.wait_for_release()
-                voltage = 0
-            else:
-                timeON = timer()
-                button.wait_for_press()
-                voltage = 3.3
-        else:
-            value = adc.analogRead(0)
-            voltage = value / 255.0 * 3.3   # calculate the voltage value
-        now = timer()
-        waitADC = (now - startADC)*1000
-
-        # handle HIGH / LOW
-        if (voltage > 3.3/2):
-            # detected ON
-            if led.is_lit:
-                # already ON: continue ON
-                countON += 1
-                text = "ON"
-            else:
-                # transition OFF -> ON: start next cycle, start ON
-                if (startRPS == 0):
-                    # startup only
-                    text = "ON FIRST"
-                else:
-                    timeRPS = now - startRPS
-                    text = "ON cycle: {:>6.1f} ms".format(1000 * timeRPS) + " = {:>3.0f} Hz".format(1/timeRPS) \
-                        + ", on={:>2d}".format(countON) + ", off={:>2d}".format(countOFF) \
-                        + ", duty={:2.2f}%".format(100 * countON/(countON + countOFF)) \
-                        + ", duration: {:>6.1f}".format(1000*(timeON - timeOFF)) + " / {:<6.1f}".format(1000*(now - timeON)) \
-                        + ", duty: {:5.2f}%".format(100 * (timeON - timeOFF)/timeRPS ) # (now - timeON))
-                
-                # start next cycle
-                led.on()
-                startRPS = now
-                countON = 1
-                countOFF = 0
-        else:
-            # detected OFF
-            if not led.is_lit:
-                # already OFF: contimue OFF
-                pass
-            else:
-                # transition ON -> OFF: start OFF
-                led.off()
-            countOFF += 1
-            text = "  "
-
-        # common logging
-        if verbose == True or text.startswith("ON "):
-            # show detail
-            print("{:5}:".format(loops),
-                "time {:2.6f}".format(now - startTest),
-                #"after {:2.3f}ms".format(waitADC),
-                "after {:>7.3f} ms".format(waitADC),
-                "shows", "{:>4.2f} V:".format(voltage),
-                text,
-                )
-
+    source = createSource(hw, "ir" if infrared else "digital" if digital else "adc")
+    cycleLoop(source, led=hw.led, verbose=verbose, when_cycle=showCycle, profiler=profiler)
 
 ###########################################################################
 # result LED
 #   ON if LDR voltage HIGH
 #   OFF else
 ###########################################################################
-from gpiozero import LED
-led = LED(17)       # define LED pin according to BCM Numbering
+#   hw.led: LED 17 according to BCM Numbering
 
 
 ###########################################################################
 # init ADC
 ###########################################################################
-from ADCDevice import *
-adc = ADCDevice() # Define an ADCDevice class object
+import i2cBus
 def startADC():
-    global adc
-    if(adc.detectI2C(0x48)): # Detect the pcf8591.
-        adc = PCF8591()
-    elif(adc.detectI2C(0x4b)): # Detect the ads7830
-        adc = ADS7830()
-    else:
+    try:
+        hw.adc  # detects the pcf8591 or ads7830, address cached by i2cDiscovery
+    except IOError:
         print("No correct I2C address found, \n"
         "Please use command 'i2cdetect -y 1' to check the I2C address! \n"
         "Program Exit. \n");
@@ -181,81 +108,51 @@ def startADC():
 ###########adc = ADCDevice() # Define an ADCDevice class object
 start = timer()
 globalstart = timer() # does not get reset
-counter = 0
 ##################led = LED(17)       # define LED pin according to BCM Numbering
-lastled = 0
 threshold_ignore_change_s = 0.005
-lastchangetime = 0
-changes = 0
-number_ignored_events = 0
 
 changes_per_spoke = 2
 number_of_spokes = 5
+rpm_window_s = 2    # at high speed rps/rpm are computed from the changes of the last rpm_window_s seconds,
+                    # at low speed from the periods of the last spokes (see RpmEstimator)
+from rpmEstimator import RpmEstimator
+rpmEstimator = RpmEstimator(rpm_window_s, changes_per_spoke, number_of_spokes)
+revolution = RevolutionCounter(threshold_ignore_change_s, estimator=rpmEstimator)  # changes, ignored events, samples
 
 def setup():
-    global adc
-    if(adc.detectI2C(0x48)): # Detect the pcf8591.
-        adc = PCF8591()
-    elif(adc.detectI2C(0x4b)): # Detect the ads7830
-        adc = ADS7830()
-    else:
+    try:
+        hw.adc  # detects the pcf8591 or ads7830, address cached by i2cDiscovery
+    except IOError:
         print("No correct I2C address found, \n"
         "Please use command 'i2cdetect -y 1' to check the I2C address! \n"
         "Program Exit. \n");
         exit(-1)
         
+def changed(revolution, now):   # registered change: the LED shows the state
+    if revolution.state:
+        hw.led.on()
+    else:
+        hw.led.off()
+
+def ignored(revolution, now):
+    print("change ignored: lastled was {};".format(int(revolution.state)), "#changes: ", revolution.changes, "at time", now - start)
+
+revolution.when_change = changed
+revolution.when_ignored = ignored
+
 def loop():
+    source = AdcSource(hw.adc, 0)
     while True:
-        global counter, lastled, changes, threshold_ignore_change_s, number_ignored_events, lastchangetime, start
-
-        if (timer() - start > 5):
-            start = timer()
-            changes = 0
-        
-        diff = timer() - start
-        hzChanges = changes / diff
-        rps = hzChanges / (changes_per_spoke*number_of_spokes)
+        rps = rpmEstimator.rps(timer())
         rpm = rps * 60
 
-        counter += 1
-        value = adc.analogRead(0)    # read the ADC value of channel 0
-        voltage = value / 255.0 * 3.3  # calculate the voltage value
-        print("rps", "{:.2f}".format(rps), "rpm", "{:.2f}".format(rpm), "voltage", "{:.2f}".format(voltage))
-        if (voltage >= (3.3/2)):
-            if (lastled == 0):
-                if (timer() - lastchangetime >= threshold_ignore_change_s):
-                    changes += 1
-                    lastchangetime = timer()
-                    diff = timer() - start
-                    hzChanges = changes / diff
-                    rps = hzChanges / (changes_per_spoke*number_of_spokes)
-                    rpm = rps * 60
-                    #print("change registered: lastled was 0, now 1; #changes: ", changes, "at time", diff, "and hzChanges", hzChanges, "rps", rps, "rpm", rpm)
-                    lastled = 1
-                    led.on()
-                else:
-                    number_ignored_events += 1
-                    print("change ignored: lastled was 0; #changes: ", changes, "at time", timer() - start)
-        else:
-            if (lastled == 1):
-                if (timer() - lastchangetime >= threshold_ignore_change_s):
-                    changes += 1
-                    lastchangetime = timer()
-                    diff = timer() - start
-                    hzChanges = changes / diff
-                    rps = hzChanges / (changes_per_spoke*number_of_spokes)
-                    rpm = rps * 60
-                    #print("change registered: lastled was 1, now 0; #changes: ", changes, "at time", diff, "and hzChanges", hzChanges, "rps", rps, "rpm", rpm)
-                    lastled = 0
-                    led.off()
-                else:
-                    number_ignored_events += 1
-                    print("change ignored: lastled was 1; #changes: ", changes, "at time", timer() - start)
-        #print ('ADC Value : %d, Voltage : %.2f'%(value,voltage), "at time", timer() - start)
+        source.poll(revolution)    # read the ADC value of channel 0
+        voltage = source.value / 255.0 * 3.3  # calculate the voltage value
+        print("rps", "{:.2f}".format(rps), "rpm", "{:.2f}".format(rpm), rpmEstimator.mode, "voltage", "{:.2f}".format(voltage))
         #time.sleep(0.1)
 
 def destroy():
-    adc.close()
+    hw.close()  # all devices created so far
     
 if __name__ == '__main__':   # Program entrance
     print ('Program is starting ... ')
@@ -294,14 +191,20 @@ if __name__ == '__main__':   # Program entrance
         parser.add_argument("-d", "--digital", help="use digital input; default: use ADC input", action="store_true")
         parser.add_argument("-i", "--infrared", help="use IR breakbeam sensor for input; default: use ADC input", action="store_true")
         parser.add_argument("-v", "--verbose", help="show all sampled values; default: only show rising edge", action="store_true")
+        parser.add_argument("-p", "--profile", help="time the stages of the test loop from the start; default: off, kill -USR2 toggles, kill -USR1 reports",
+                            action="store_true")
         args = parser.parse_args()
         print (args)
+        installSignals(profiler)
+        if args.profile:
+            profiler.enable()
 
         # show lcd message
         lcd1602 = initLCD()
         lcd1602.clear()
-        lcd1602.write(0, 0, str(args.frequency) + " " + str(args.dutycycle))
-        lcd1602.write(0, 1, ("-t " if args.test else "") + ("-d " if args.digital else "") + ("-i " if args.infrared else "") + ("-v " if args.verbose else ""))
+        lcdService = LcdService(lcd1602)
+        lcdService.set_line(0, str(args.frequency) + " " + str(args.dutycycle))
+        lcdService.set_line(1, ("-t " if args.test else "") + ("-d " if args.digital else "") + ("-i " if args.infrared else "") + ("-v " if args.verbose else ""))
         
         startADC()
 
@@ -321,23 +224,22 @@ if __name__ == '__main__':   # Program entrance
         #startPwmLed(100, 0.1)  # NO: 11 rps
         #startPwmLed(100, 0.5)  # NO: 0.0
 
-        #global button
         if args.test:
-            if args.infrared:
-                # adafruit IR breakbeam: Open Collector with external pullup; inverted logic
-                button = Button(23, pull_up = None, active_state=False)
-            else:
-                # digital: LDR via voltage devidor
-                button = Button(18, bounce_time=0.001)
+            # -i: adafruit IR breakbeam, -d: LDR via voltage devidor; see revolutionEngine.createSource
             testLoop(args.verbose, args.digital, args.infrared)
         else:
             loop()
     except KeyboardInterrupt: # Press ctrl-c to end the program.
+        if lcdService is not None:
+            lcdService.close()
+        print(i2cBus.report())  # before destroy: closing the last client closes the bus
         destroy()
+        if profiler.iterations:
+            print(profiler.report())
         print("Ending program")        
         end = timer()
         diff = end - globalstart
-        hzSampling = counter / diff
-        print("after diff", diff, "counter is at", counter, "with hz", hzSampling, "ignored events", number_ignored_events)
+        hzSampling = revolution.samples / diff
+        print("after diff", diff, "counter is at", revolution.samples, "with hz", hzSampling, "ignored events", revolution.ignored)
         print (args)
         
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : lcdService.py
+# Description : non-blocking LCD output: a render thread draws the newest
+#               text of each line at a limited refresh rate
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import threading
+import time
+
+###########################################################################
+# LcdService
+#   set_line(row, text) only stores the text and wakes the render thread,
+#   it never touches the I2C bus; values set between two refreshes are
+#   dropped, only the newest text of each line is drawn
+#   an OSError of the bus (e.g. no acknowledge) is counted in errors, the
+#   line is drawn again at the next refresh
+#
+#   works with LCD1602.CharLCD1602 (write(x, y, text)) and with
+#   Adafruit_LCD1602.Adafruit_CharLCD (setCursor + message), e.g. over PCF8574_GPIO
+###########################################################################
+class LcdService(object):
+    def __init__(self, lcd, maxRate_hz=10, cols=16, rows=2):
+        self.lcd = lcd
+        self.cols = cols
+        self.interval_s = 1.0 / maxRate_hz
+        self.lines = [None] * rows  # newest text per row
+        self.shown = [None] * rows  # text on the display
+        self.updates = 0            # set_line calls
+        self.redraws = 0            # lines drawn
+        self.errors = 0             # draws that failed on the bus
+        self.wake = threading.Event()
+        self.running = True
+        if hasattr(lcd, "setCursor"):
+            self.draw = self._drawAdafruit
+        else:
+            self.draw = self._drawCharLCD
+        self.thread = threading.Thread(target=self._run, name="LcdService", daemon=True)
+        self.thread.start()
+
+    def set_line(self, row, text):
+        self.lines[row] = text
+        self.updates += 1
+        self.wake.set()
+
+    def _drawCharLCD(self, row, text):
+        self.lcd.write(0, row, text)
+
+    def _drawAdafruit(self, row, text):
+        self.lcd.setCursor(0, row)
+        self.lcd.message(text)
+
+    def _run(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            if not self.running:
+                return
+            start = time.monotonic()
+            for row, text in enumerate(self.lines):
+                if text is not None and text != self.shown[row]:
+                    try:
+                        self.draw(row, text[:self.cols].ljust(self.cols))
+                    except OSError:
+                        self.errors += 1
+                        self.shown[row] = None
+                        if hasattr(self.lcd, "invalidate"):
+                            self.lcd.invalidate()   # the shadow framebuffer may not match the display
+                        self.wake.set()             # retry at the next refresh
+                        continue
+                    self.shown[row] = text
+                    self.redraws += 1
+            rest = self.interval_s - (time.monotonic() - start)
+            if rest > 0:
+                time.sleep(rest)
+
+    def close(self):
+        """ stop the render thread; text set after the last refresh is not drawn """
+        self.running = False
+        self.wake.set()
+        self.thread.join()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : logWriter.py
+# Description : asynchronous, batched log output for the sampling loops
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import sys
+import queue
+import threading
+
+###########################################################################
+# LogWriter
+#   the sampling loop only enqueues raw tuples: (format, value, value, ...)
+#   a background thread formats them (format.format(*values)) and writes
+#   them in batches, so print/format/terminal speed do not slow the loop
+#
+#   policy:
+#       every=N     log only every N-th record (edge records are always logged)
+#       edgesOnly   log only records passed with edge=True
+#   if the queue is full, records are dropped and counted (never blocks)
+###########################################################################
+class LogWriter(object):
+    def __init__(self, every=1, edgesOnly=False, maxsize=10000, batchSize=256, stream=None, formatter=None):
+        self.every = max(1, every)
+        self.edgesOnly = edgesOnly
+        self.batchSize = batchSize
+        self.stream = stream
+        if formatter is not None:
+            self.format = formatter
+        self.queue = queue.Queue(maxsize)
+        self.countdown = self.every
+        self.written = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self.thread.start()
+
+    def log(self, record, edge=False):
+        if not edge:
+            if self.edgesOnly:
+                return
+            self.countdown -= 1
+            if self.countdown:
+                return
+            self.countdown = self.every
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    @staticmethod
+    def format(record):
+        return record[0].format(*record[1:])
+
+    def _run(self):
+        get = self.queue.get
+        getNow = self.queue.get_nowait
+        while True:
+            records = [get()]
+            try:
+                while len(records) < self.batchSize:
+                    records.append(getNow())
+            except queue.Empty:
+                pass
+            # the stop request; records that a log() racing with close() put after it are not written
+            stop = None in records
+            if stop:
+                del records[records.index(None):]
+            if records:
+                stream = self.stream or sys.stdout
+                stream.write("\n".join([self.format(record) for record in records]) + "\n")
+                stream.flush()
+                self.written += len(records)
+            if stop:
+                return
+
+    def close(self):
+        """ write all queued records and stop the writer thread """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
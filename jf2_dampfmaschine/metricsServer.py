@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : metricsServer.py
+# Description : Prometheus metrics of the revolution counter, the LCD and
+#               the I2C bus, served over HTTP on localhost
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import threading
+import time
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import i2cBus
+
+###########################################################################
+# usage:
+#       metrics = MetricsServer(revolution, loopTimer=loopTimer, port=9108).start()
+#       ...  metrics.sampler = sampler  (optional: overruns, acquisition rate)
+#       curl http://127.0.0.1:9108/metrics
+#       metrics.close()
+#
+#   a render thread builds the whole text every interval_s from the
+#   counters of the objects (plain attribute reads, no locks); a scrape
+#   only sends the last rendered bytes, it never runs in or waits for
+#   the sampling loop
+#
+#   rpm is the mean over the last render interval, from the number of
+#   registered changes; the render thread only reads the counter, it does
+#   not call the RpmEstimator of the sampling loop
+#   the rpm histogram is observed once per interval
+###########################################################################
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+RPM_BUCKETS = (30, 60, 120, 240, 480, 960, 1920, 3840)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.body
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass    # no line per scrape on the console of the counter
+
+
+class MetricsServer(object):
+    def __init__(self, revolution=None, sampler=None, loopTimer=None, lcdService=None,
+                 port=9108, host="127.0.0.1", interval_s=1.0):
+        self.revolution = revolution    # revolutionEngine.RevolutionCounter
+        self.sampler = sampler          # Sampler / RtSampler
+        self.loopTimer = loopTimer      # statsSegment.LoopTimer
+        self.lcdService = lcdService
+        self.interval_s = interval_s
+        self.buckets = [0] * (len(RPM_BUCKETS) + 1)    # last one: +Inf
+        self.rpmSum = 0.0
+        self.renders = 0
+        self.lastChanges = 0
+        self.lastTime = time.monotonic()
+        self.body = b""
+        self.running = False
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.metrics = self
+        self.port = self.server.server_address[1]  # port=0: any free port
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        self.body = self.render()
+        self.threads = [threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True),
+                        threading.Thread(target=self._run, name="MetricsRender", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.interval_s)
+            self.body = self.render()
+
+    def render(self):
+        lines = []
+        def metric(name, kind, help, samples):
+            lines.append("# HELP {} {}".format(name, help))
+            lines.append("# TYPE {} {}".format(name, kind))
+            for labels, value in samples:
+                lines.append("{}{} {}".format(name, labels, value))
+
+        revolution = self.revolution
+        if revolution is not None:
+            now = time.monotonic()
+            changes = revolution.changes
+            elapsed = now - self.lastTime
+            rpm = (changes - self.lastChanges) / revolution.estimator.changesPerRevolution / elapsed * 60 if elapsed > 0 else 0.0
+            self.lastChanges = changes
+            self.lastTime = now
+            self.buckets[bisect_left(RPM_BUCKETS, rpm)] += 1
+            self.rpmSum += rpm
+            metric("revolution_rpm", "gauge", "revolutions per minute, mean over the render interval", [("", rpm)])
+            cumulative = 0
+            histogram = []
+            for bound, count in zip(RPM_BUCKETS + ("+Inf",), self.buckets):
+                cumulative += count
+                histogram.append(('_bucket{{le="{}"}}'.format(bound), cumulative))
+            histogram.append(("_sum", self.rpmSum))
+            histogram.append(("_count", cumulative))
+            metric("revolution_rpm_observed", "histogram", "rpm, observed once per render interval", histogram)
+            metric("revolution_samples_total", "counter", "samples fed into the counter", [("", revolution.samples)])
+            metric("revolution_changes_total", "counter", "registered HIGH/LOW changes", [("", revolution.changes)])
+            metric("revolution_ignored_total", "counter", "changes ignored by the debounce", [("", revolution.ignored)])
+            metric("revolution_cycles_total", "counter", "completed cycles", [("", revolution.cycles)])
+            metric("revolution_period_seconds", "gauge", "period of the last cycle", [("", revolution.period)])
+        sampler = self.sampler
+        if sampler is not None:
+            metric("sampler_samples_per_second", "gauge", "acquisition rate of the sampler", [("", sampler.samplesPerSecond)])
+            metric("sampler_overruns_total", "counter", "samples overwritten before they were processed", [("", sampler.overruns)])
+        loopTimer = self.loopTimer
+        if loopTimer is not None:
+            metric("loop_iterations_total", "counter", "iterations of the processing loop", [("", loopTimer.iterations)])
+            metric("loop_seconds_total", "counter", "time spent in the processing loop", [("", loopTimer.total_ns / 1e9)])
+            metric("loop_seconds_max", "gauge", "longest loop iteration", [("", loopTimer.max_ns / 1e9)])
+        if self.lcdService is not None:
+            metric("lcd_updates_total", "counter", "lines handed to the LCD service", [("", self.lcdService.updates)])
+            metric("lcd_redraws_total", "counter", "lines drawn on the LCD", [("", self.lcdService.redraws)])
+            metric("lcd_errors_total", "counter", "LCD draws that failed on the I2C bus", [("", self.lcdService.errors)])
+        # handles of the same client name (e.g. reopened) are summed up
+        clients = {}
+        for busnum, client in i2cBus.clients():
+            label = '{{bus="{}",client="{}"}}'.format(busnum, client.name)
+            total = clients.setdefault(label, [0, 0, 0, 0])
+            total[0] += client.transactions
+            total[1] += client.busy_ns
+            total[2] += client.wait_ns
+            total[3] = max(total[3], client.maxWait_ns)
+        if clients:
+            totals = sorted(clients.items())
+            metric("i2c_transactions_total", "counter", "I2C transactions per client", [(label, total[0]) for label, total in totals])
+            metric("i2c_busy_seconds_total", "counter", "time holding the I2C bus", [(label, total[1] / 1e9) for label, total in totals])
+            metric("i2c_wait_seconds_total", "counter", "time queued for the I2C bus", [(label, total[2] / 1e9) for label, total in totals])
+            metric("i2c_wait_seconds_max", "gauge", "longest wait for the I2C bus", [(label, total[3] / 1e9) for label, total in totals])
+        self.renders += 1
+        return ("\n".join(lines) + "\n").encode()
+
+    def close(self):
+        self.running = False
+        self.server.shutdown()
+        self.server.server_close()
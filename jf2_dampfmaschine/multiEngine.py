@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : multiEngine.py
+# Description : monitors several engines in one process: ADC channels
+#               scanned together, GPIO inputs by edge events, one
+#               aggregated LCD and log
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import time
+from revolutionEngine import RevolutionCounter, THRESHOLD
+
+ADC = "adc"         # LDR via voltage devider on an ADC channel
+GPIO = "gpio"       # LDR via voltage devider on a digital input, pull up
+IR = "ir"           # adafruit IR breakbeam: Open Collector with external pullup; inverted logic
+KINDS = (ADC, GPIO, IR)
+
+ENGINE_FORMAT = "{0:<8} rpm {1:8.2f} {2:<6} changes {3:>7} ignored {4:>6}"
+
+
+###########################################################################
+# Engine
+#   one monitored engine: its input (ADC channel or GPIO pin), its spoke
+#   geometry and debounce, and the RevolutionCounter that counts it
+###########################################################################
+class Engine(object):
+    def __init__(self, name, kind=ADC, channel=0, changes_per_spoke=2, number_of_spokes=5, debounce_s=0.005):
+        if kind not in KINDS:
+            raise ValueError("unknown engine kind: " + str(kind))
+        self.name = name
+        self.kind = kind
+        self.channel = channel      # ADC channel or BCM pin
+        self.counter = RevolutionCounter(debounce_s, changes_per_spoke, number_of_spokes)
+        self.edgeCounter = None     # GPIO / IR: the EdgeCounter of the pin
+        self.clock = time.monotonic # clock of the timestamps fed into the counter
+
+    def rpm(self):
+        return self.counter.rpm(self.clock())
+
+    @classmethod
+    def parse(cls, spec):
+        """ "kind:channel[:changes_per_spoke[:number_of_spokes[:debounce_s]]]", e.g. "adc:0", "ir:23:2:5", "gpio:18:2:5:0.001" """
+        fields = spec.split(":")
+        if len(fields) < 2 or len(fields) > 5:
+            raise ValueError("engine: kind:channel[:changes_per_spoke[:number_of_spokes[:debounce_s]]], not " + spec)
+        kind = fields[0]
+        channel = int(fields[1])
+        args = [int(x) for x in fields[2:4]] + [float(x) for x in fields[4:5]]
+        return cls(kind + str(channel), kind, channel, *args)
+
+
+###########################################################################
+# MultiMonitor
+#   ADC engines: all their channels are read with one adc.scan() per
+#   cycle, so the I2C bus is shared by one process, not contended by N
+#   GPIO / IR engines: the pin backend feeds every edge into the counter
+#   from its own thread, nothing is polled
+#
+#   every report_s all engines are written to the LogWriter and to the
+#   LcdService: row r shows the engines r, r + rows, ...
+###########################################################################
+class MultiMonitor(object):
+    def __init__(self, engines, hw=None, logWriter=None, lcdService=None, report_s=1.0):
+        self.engines = list(engines)
+        self.adcEngines = [engine for engine in self.engines if engine.kind == ADC]
+        self.pinEngines = [engine for engine in self.engines if engine.kind != ADC]
+        self.hw = hw
+        self.logWriter = logWriter
+        self.lcdService = lcdService
+        self.report_s = report_s
+        self.scans = 0
+        self.adc = None
+
+    def start(self):
+        from edgeCounter import EdgeCounter
+        if self.adcEngines:
+            self.adc = self.hw.adc
+            self.adc.setScanChannels([engine.channel for engine in self.adcEngines])
+        for engine in self.pinEngines:
+            if engine.kind == IR:
+                edgeCounter = EdgeCounter(engine.channel, pull_up=None, active_state=False)
+            else:
+                edgeCounter = EdgeCounter(engine.channel)
+            edgeCounter.when_edge = self._edgeFeeder(engine.counter)
+            engine.edgeCounter = edgeCounter
+            engine.clock = edgeCounter.factory.ticks
+        return self
+
+    @staticmethod
+    def _edgeFeeder(counter):
+        # debounce is done by the counter, like for the ADC engines
+        def edge(edgeCounter, ticks, active):
+            counter.feed(ticks, active)
+        return edge
+
+    def scan(self):
+        """ one pass over all ADC channels """
+        values = self.adc.scan()
+        timestamp = self.adc.scanTime / 1e9     # monotonic
+        for engine, value in zip(self.adcEngines, values):
+            engine.counter.feed(timestamp, value >= THRESHOLD)
+        self.scans += 1
+
+    def report(self):
+        rpms = [engine.rpm() for engine in self.engines]
+        if self.logWriter is not None:
+            for engine, rpm in zip(self.engines, rpms):
+                counter = engine.counter
+                self.logWriter.log((ENGINE_FORMAT, engine.name, rpm, counter.estimator.mode, counter.changes, counter.ignored))
+        if self.lcdService is not None:
+            rows = len(self.lcdService.lines)
+            for row in range(rows):
+                self.lcdService.set_line(row, " ".join("{:.0f}".format(rpm) for rpm in rpms[row::rows]))
+        return rpms
+
+    def run(self):
+        nextReport = time.monotonic() + self.report_s
+        while True:
+            if self.adcEngines:
+                self.scan()
+            else:
+                time.sleep(max(0.0, nextReport - time.monotonic()))
+            now = time.monotonic()
+            if now >= nextReport:
+                self.report()
+                nextReport = now + self.report_s
+
+    def close(self):
+        for engine in self.pinEngines:
+            if engine.edgeCounter is not None:
+                engine.edgeCounter.close()
+                engine.edgeCounter = None
+
+
+if __name__ == '__main__':   # Program entrance
+    import argparse
+    import i2cBus
+    from hardware import Hardware
+    from logWriter import LogWriter
+    from lcdService import LcdService
+    parser  = argparse.ArgumentParser()
+    parser.add_argument("engines", help="one per engine: kind:channel[:changes_per_spoke[:number_of_spokes[:debounce_s]]], "
+                        "kind adc (ADC channel), gpio (LDR on a pin) or ir (IR breakbeam on a pin); e.g. adc:0 adc:1 ir:23", nargs="+")
+    parser.add_argument("-r", "--report", help="seconds between two reports; default 1", type=float, default=1.0)
+    parser.add_argument("-l", "--lcd", help="show the rpm of all engines on the LCD", action="store_true")
+    parser.add_argument("-T", "--trace", help="count the I2C transactions per device, see i2cTrace.py; with FILE: also write a binary trace",
+                        nargs="?", const="", metavar="FILE")
+    args = parser.parse_args()
+    if args.trace is not None:
+        i2cBus.startTrace(1, args.trace or None)
+
+    try:
+        engines = [Engine.parse(spec) for spec in args.engines]
+        hw = Hardware()
+        logWriter = LogWriter()
+        lcdService = LcdService(hw.lcd) if args.lcd else None
+        monitor = MultiMonitor(engines, hw, logWriter, lcdService, args.report)
+        try:
+            monitor.start()
+            monitor.run()
+        except KeyboardInterrupt: # Press ctrl-c to end the program.
+            pass
+        finally:
+            monitor.close()
+            if lcdService is not None:
+                lcdService.close()
+            logWriter.close()
+            print(i2cBus.report())  # before hw.close: closing the last client closes the bus
+            if args.trace is not None:
+                print(i2cBus.traceReport())
+            hw.close()
+            for engine in engines:
+                print(engine.name, "changes", engine.counter.changes, "ignored", engine.counter.ignored, "samples", engine.counter.samples)
+    finally:
+        if args.trace is not None:
+            i2cBus.stopTrace(1)     # flushes the buffered records into the trace file on any exit
@@ -12,8 +12,8 @@ from timeit import default_timer as timer
 # for calibration tests: shine the LDR with a PWM LED
 #   with specified  frequency and duty cycle
 ###########################################################################
-from gpiozero import PWMLED
-pwmLed = PWMLED(27)
+from hardware import Hardware
+hw = Hardware()     # LEDs, buttons, ADC and LCD are created on first use, see hardware.py
 '''
 start or restart the pwmLed with specified params.
 :param int frequency:
@@ -24,6 +24,7 @@ start or restart the pwmLed with specified params.
         Exampel: 0.1 specifies ON for 10% (and OFF for 90%) of the cycle: "short pulse"
 '''
 def startPwmLed(frequency=1, dutyCycle=0.1):  # blinks very slow (1/sec); short ON (10%), long OFF (90%)
+    pwmLed = hw.pwmLed
     pwmLed.on()     # must turn on before setting value!
     pwmLed.frequency = frequency
     pwmLed.value = dutyCycle
@@ -34,7 +35,6 @@ def startPwmLed(frequency=1, dutyCycle=0.1):  # blinks very slow (1/sec); short
 # Button controlled by LDR + R-Bridge
 #   instead of ADC
 ###########################################################################
-from gpiozero import Button
 #button = Button(18, bounce_time=5) # does not work for button.is_pressed
 #button = Button(18)
 #button = Button(18, bounce_time=0.005)
@@ -46,106 +46,73 @@ from gpiozero import Button
 ###########################################################################
 #import smbus
 def initLCD() :
-    from LCD1602 import CharLCD1602
-    lcd1602 = CharLCD1602() 
-    lcd1602.init_lcd()
+    lcd1602 = hw.lcd
     lcd1602.clear()
     lcd1602.write(0, 0, "TEST" )
     lcd1602.write(0, 1, "EINS" )
     return lcd1602
 #initLCD()
 
+# LcdService around the LCD: the loops only hand over text, rendering runs in its own thread
+from lcdService import LcdService
+from revolutionEngine import CYCLE_STAGES, RevolutionCounter, createSource, cycleLoop
+lcdService = None
+LCD_CYCLE_FORMAT = "{:>6.1f}ms {:>5.1f}Hz"
+
+from stageProfiler import StageProfiler, installSignals
+profiler = StageProfiler(CYCLE_STAGES)  # stages of the test loop; --profile or kill -USR2 enable it
+
 
 ###########################################################################
 # the test loop
-#   analogRead of LDR voltage (8bit), or digital  is_pressed, or wait_for_press/release
-#   handle HIGH/LOW value
-#   turn led ON/OFF
-#   prints ADC sample time and value
+#   analogRead of LDR voltage (8bit), or digital wait_for_press/release
+#   prints every cycle, see revolutionEngine.cycleLoop
 ###########################################################################
+def showCycle(counter):
+    if lcdService is not None:
+        lcdService.set_line(1, LCD_CYCLE_FORMAT.format(1000 * counter.period, 1/counter.period))
+
 def testLoop(mode="ir", skipRelease=False, verbose=False):
     print("testloop:", "mode=" + mode, "skipRelease=" + str(skipRelease), "verbose=" + str(verbose))
+    cycleLoop(createSource(hw, mode), revolution, hw.led, verbose, showCycle, profiler)
 
-    startTest = timer()    
-    startRPS = 0
-    timeRPS = 0
-    countON = 0
-    countOFF = 0
-    timeON = 0
-    timeOFF = 0
-    loops = 0
-
-    led.off()
-    while True:
-        loops += 1 
-
-        # read the ADC (voltage) of channel 0
-        startADC = timer()
-        #if (digital or infrared):
-        if (mode == "ir" or mode == "digital"):
-            #voltage = 3.3 if button.is_pressed else 0
-            if (led.is_lit):
-                timeOFF = timer()
-                #if skipRelease:    # DOES NOT WORK: we need something like "wait_for_rising_edge", but only have "wait_for_press/release"
-                                    # try GPIO.wait_for_edge(channel, GPIO.RISING) ??
-                button.wait_for_release()
-                voltage = 0
-            else:
-                timeON = timer()
-                button.wait_for_press()
-                voltage = 3.3
-        else:   # mode == ADC
-            value = adc.analogRead(0)
-            voltage = value / 255.0 * 3.3   # calculate the voltage value
-        now = timer()
-        waitADC = (now - startADC)*1000
-
-        # handle HIGH / LOW
-        if (voltage > 3.3/2):
-            # detected ON
-            if led.is_lit:
-                # already ON: continue ON
-                countON += 1
-                text = "ON"
-            else:
-                # transition OFF -> ON: start next cycle, start ON
-                if (startRPS == 0):
-                    # startup only
-                    text = "ON FIRST"
-                else:
-                    timeRPS = now - startRPS
-                    text = "ON cycle: {:>6.1f} ms".format(1000 * timeRPS) + " = {:>3.0f} Hz".format(1/timeRPS) \
-                        + ", on={:>2d}".format(countON) + ", off={:>2d}".format(countOFF) \
-                        + ", duty={:2.2f}%".format(100 * countON/(countON + countOFF)) \
-                        + ", duration: {:>6.1f}".format(1000*(timeON - timeOFF)) + " / {:<6.1f}".format(1000*(now - timeON)) \
-                        + ", duty: {:5.2f}%".format(100 * (timeON - timeOFF)/timeRPS ) # (now - timeON))
-                
-                # start next cycle
-                led.on()
-                startRPS = now
-                countON = 1
-                countOFF = 0
-        else:
-            # detected OFF
-            if not led.is_lit:
-                # already OFF: contimue OFF
-                pass
-            else:
-                # transition ON -> OFF: start OFF
-                led.off()
-            countOFF += 1
-            text = "  "
+###########################################################################
+# the edge loop
+#   no polling: both edges of the IR breakbeam (pin 23) and of the
+#   LDR (pin 18) are delivered by the pin backend with their timestamps
+#   prints period, frequency and duty cycle of every completed cycle
+###########################################################################
+def edgeLoop(verbose=False, captureWriter=None):
+    print("edgeloop:", "verbose=" + str(verbose))
+    from edgeCounter import EdgeCounter
+    import queue
+    cycles = queue.Queue()
+    # adafruit IR breakbeam: Open Collector with external pullup; inverted logic
+    ir = EdgeCounter(23, pull_up=None, active_state=False, capture=captureWriter)
+    # digital: LDR via voltage devider
+    ldr = EdgeCounter(18, debounce_s=0.001, capture=captureWriter)
+    ir.when_cycle = lambda counter: cycles.put(("ir", counter.cycles, counter.period, counter.onTime))
+    ldr.when_cycle = lambda counter: cycles.put(("ldr", counter.cycles, counter.period, counter.onTime))
 
-        # common logging
-        if verbose == True or text.startswith("ON "):
-            # show detail
-            print("{:5}:".format(loops),
-                "time {:2.6f}".format(now - startTest),
-                #"after {:2.3f}ms".format(waitADC),
-                "after {:>7.3f} ms".format(waitADC),
-                "shows", "{:>4.2f} V:".format(voltage),
-                text,
+    led = hw.led
+    startTest = timer()
+    try:
+        while True:
+            name, count, period, onTime = cycles.get()
+            if name == "ir":
+                led.toggle()
+                if lcdService is not None:
+                    lcdService.set_line(1, LCD_CYCLE_FORMAT.format(1000 * period, 1/period))
+            print("{:>3}".format(name), "{:5}:".format(count),
+                "time {:2.6f}".format(timer() - startTest),
+                "cycle: {:>9.3f} ms".format(1000 * period) + " = {:>6.1f} Hz".format(1/period),
+                ", on: {:>9.3f} ms".format(1000 * onTime),
+                ", duty: {:5.2f}%".format(100 * onTime/period),
+                ", ignored={}".format(ldr.ignored) if (verbose and name == "ldr") else "",
                 )
+    finally:
+        ir.close()
+        ldr.close()
 
 """ sometimes on start, if very "fast" (freq or duty)
 
@@ -180,22 +147,17 @@ AttributeError: 'NoneType' object has no attribute 'holding'
 #   ON if LDR voltage HIGH
 #   OFF else
 ###########################################################################
-from gpiozero import LED
-led = LED(17)       # define LED pin according to BCM Numbering
+#   hw.led: LED 17 according to BCM Numbering
 
 
 ###########################################################################
 # init ADC
 ###########################################################################
-from ADCDevice import *
-adc = ADCDevice() # Define an ADCDevice class object
+import i2cBus
 def startADC():
-    global adc
-    if(adc.detectI2C(0x48)): # Detect the pcf8591.
-        adc = PCF8591()
-    elif(adc.detectI2C(0x4b)): # Detect the ads7830
-        adc = ADS7830()
-    else:
+    try:
+        hw.adc  # detects the pcf8591 or ads7830, address cached by i2cDiscovery
+    except IOError:
         print("No correct I2C address found, \n"
         "Please use command 'i2cdetect -y 1' to check the I2C address! \n"
         "Program Exit. \n");
@@ -211,31 +173,24 @@ def startADC():
 ###########adc = ADCDevice() # Define an ADCDevice class object
 start = timer()
 globalstart = timer() # does not get reset
-counter = 0
 ##################led = LED(17)       # define LED pin according to BCM Numbering
-lastled = 0
 threshold_ignore_change_s = 0.005
-lastchangetime = 0
-changes = 0
-number_ignored_events = 0
 
 changes_per_spoke = 2
 number_of_spokes = 5
+revolution = RevolutionCounter(0, changes_per_spoke, number_of_spokes)    # test loop: every change counts
 
 def setup():
-    global adc
-    if(adc.detectI2C(0x48)): # Detect the pcf8591.
-        adc = PCF8591()
-    elif(adc.detectI2C(0x4b)): # Detect the ads7830
-        adc = ADS7830()
-    else:
+    try:
+        hw.adc  # detects the pcf8591 or ads7830, address cached by i2cDiscovery
+    except IOError:
         print("No correct I2C address found, \n"
         "Please use command 'i2cdetect -y 1' to check the I2C address! \n"
         "Program Exit. \n");
         exit(-1)
 
 def destroy():
-    adc.close()
+    hw.close()  # all devices created so far
     
 if __name__ == '__main__':   # Program entrance
     print ('Program is starting ... ')
@@ -244,18 +199,25 @@ if __name__ == '__main__':   # Program entrance
         # https://docs.python.org/3/howto/argparse.html
         import argparse
         parser  = argparse.ArgumentParser()
-        parser.add_argument("mode", help="mode: ir breakbeam, or LDR+ADC, or LDR-digital", choices=["ir", "adc", "digital"], default="ir")
+        parser.add_argument("mode", help="mode: ir breakbeam, or LDR+ADC, or LDR-digital, or edge timestamps of ir and LDR", choices=["ir", "adc", "digital", "edge"], default="ir")
         parser.add_argument("frequency", help="frequency of the PWM LED (1 .. 1000, default 1)", type=int, nargs = "?", default=1) 
         parser.add_argument("dutycycle", help="duty cycle of the PWM LED (0 .. 1, default 0.1)", type=float, nargs="?", default=0.1)
         parser.add_argument("-s", "--skipRelease", help="for revolution detection: do no wait for release; default: wait", action="store_true")
         parser.add_argument("-v", "--verbose", help="show all sampled values; default: only show rising edge", action="store_true")
+        parser.add_argument("-p", "--profile", help="time the stages of the test loop from the start; default: off, kill -USR2 toggles, kill -USR1 reports",
+                            action="store_true")
+        parser.add_argument("-c", "--capture", help="edge mode: record the edges of both inputs into this capture file")
         args = parser.parse_args()
         print (args)
+        installSignals(profiler)
+        if args.profile:
+            profiler.enable()
 
         # show lcd message
         lcd1602 = initLCD()
         lcd1602.clear()
-        lcd1602.write(0, 0, args.mode + " " + str(args.frequency) + " " + str(args.dutycycle) + (" -s" if args.skipRelease else "") + (" -v" if args.verbose else ""))
+        lcdService = LcdService(lcd1602)
+        lcdService.set_line(0, args.mode + " " + str(args.frequency) + " " + str(args.dutycycle) + (" -s" if args.skipRelease else "") + (" -v" if args.verbose else ""))
         
         startADC()
 
@@ -275,21 +237,33 @@ if __name__ == '__main__':   # Program entrance
         #startPwmLed(100, 0.1)  # NO: 11 rps
         #startPwmLed(100, 0.5)  # NO: 0.0
 
-        if args.mode == "ir":
-            # adafruit IR breakbeam: Open Collector with external pullup; inverted logic
-            button = Button(23, pull_up = None, active_state=False)
+        if args.mode == "edge":
+            # IR breakbeam and LDR together, timed by the pin backend
+            captureWriter = None
+            if args.capture:
+                import capture
+                captureWriter = capture.CaptureWriter(args.capture, capture.EDGE, 23, 0, changes_per_spoke, number_of_spokes,
+                                                      args.frequency, args.dutycycle)
+            try:
+                edgeLoop(args.verbose, captureWriter)
+            finally:
+                if captureWriter is not None:
+                    captureWriter.close()
         else:
-            # digital: LDR via voltage devider
-            button = Button(18, bounce_time=0.001)
-
-        testLoop(args.mode, args.skipRelease, args.verbose)
+            # ir: adafruit IR breakbeam, digital: LDR via voltage devider, adc: LDR via ADC; see revolutionEngine.createSource
+            testLoop(args.mode, args.skipRelease, args.verbose)
         
     except KeyboardInterrupt: # Press ctrl-c to end the program.
+        if lcdService is not None:
+            lcdService.close()
+        print(i2cBus.report())  # before destroy: closing the last client closes the bus
         destroy()
+        if profiler.iterations:
+            print(profiler.report())
         print("Ending program")        
         end = timer()
         diff = end - globalstart
-        hzSampling = counter / diff
-        print("after diff", diff, "counter is at", counter, "with hz", hzSampling, "ignored events", number_ignored_events)
+        hzSampling = revolution.samples / diff
+        print("after diff", diff, "counter is at", revolution.samples, "with hz", hzSampling, "ignored events", revolution.ignored)
         print (args)
         
\ No newline at end of file
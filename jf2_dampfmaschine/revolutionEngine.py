@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : revolutionEngine.py
+# Description : revolution counting engine: debounced HIGH/LOW changes
+#               from pluggable signal sources (ADC, LDR button, IR
+#               breakbeam, Sampler batches, capture replay)
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+from array import array
+from timeit import default_timer as timer
+from rpmEstimator import RpmEstimator
+
+###########################################################################
+# HIGH threshold of 8 bit ADC values: voltage = value / 255.0 * 3.3 >= 3.3/2
+###########################################################################
+THRESHOLD = 128
+
+IR_PIN = 23     # adafruit IR breakbeam: Open Collector with external pullup; inverted logic
+LDR_PIN = 18    # LDR via voltage devider, digital input
+
+
+###########################################################################
+# RevolutionCounter
+#   feed(timestamp, level): one sample; a level that differs from the
+#       current state is a change, if at least debounce_s passed since the
+#       last registered change; otherwise it is an ignored event and the
+#       state stays (same rule as analysis.detectChanges)
+#   feed_many(times, values, count, threshold, scale): a batch of raw
+#       values, HIGH if value >= threshold; timestamps * scale are seconds
+#
+#   registered changes go into the RpmEstimator; every rising change
+#   completes a cycle (period, onTime of the previous cycle)
+#
+#   when_change(counter, timestamp) / when_ignored(counter, timestamp)
+#   are called after the state was updated
+###########################################################################
+class RevolutionCounter(object):
+    __slots__ = ("debounce_s", "state", "lastChange", "lastRise", "lastFall",
+                 "changes", "ignored", "samples", "cycles", "period", "onTime",
+                 "estimator", "when_change", "when_ignored")
+
+    def __init__(self, debounce_s=0.005, changes_per_spoke=2, number_of_spokes=5, window_s=2.0, estimator=None):
+        self.debounce_s = debounce_s
+        self.state = False
+        self.lastChange = 0.0
+        self.lastRise = None
+        self.lastFall = None
+        self.changes = 0
+        self.ignored = 0
+        self.samples = 0
+        self.cycles = 0
+        self.period = 0.0       # last complete cycle, rising to rising change
+        self.onTime = 0.0       # HIGH part of that cycle
+        if estimator is None:
+            estimator = RpmEstimator(window_s, changes_per_spoke, number_of_spokes)
+        self.estimator = estimator
+        self.when_change = None
+        self.when_ignored = None
+
+    def _change(self, timestamp, level):
+        self.changes += 1
+        self.lastChange = timestamp
+        self.state = level
+        self.estimator.addEdge(timestamp)
+        if level:
+            if self.lastRise is not None:
+                self.period = timestamp - self.lastRise
+                self.onTime = self.lastFall - self.lastRise if self.lastFall is not None else 0.0
+                self.cycles += 1
+            self.lastRise = timestamp
+        else:
+            self.lastFall = timestamp
+        if self.when_change is not None:
+            self.when_change(self, timestamp)
+
+    def _ignore(self, timestamp):
+        self.ignored += 1
+        if self.when_ignored is not None:
+            self.when_ignored(self, timestamp)
+
+    def feed(self, timestamp, level):
+        """ one sample; True if it registered a change """
+        self.samples += 1
+        if level == self.state:
+            return False
+        if timestamp - self.lastChange >= self.debounce_s:
+            self._change(timestamp, level)
+            return True
+        self._ignore(timestamp)
+        return False
+
+    def feed_many(self, times, values, count=None, threshold=THRESHOLD, scale=1.0):
+        """ count samples (default: all), HIGH if value >= threshold; returns the number of registered changes """
+        if count is None:
+            count = min(len(times), len(values))
+        self.samples += count
+        before = self.changes
+        state = self.state
+        debounce_s = self.debounce_s
+        for i in range(count):
+            # only samples on the other level need the timestamp
+            if (values[i] >= threshold) != state:
+                timestamp = times[i] * scale
+                if timestamp - self.lastChange >= debounce_s:
+                    state = not state
+                    self._change(timestamp, state)
+                else:
+                    self._ignore(timestamp)
+        return self.changes - before
+
+    def rps(self, now=None):
+        return self.estimator.rps(now)
+
+    def rpm(self, now=None):
+        return self.estimator.rpm(now)
+
+
+###########################################################################
+# signal sources
+#   poll(counter) feeds the next sample(s) into the counter and returns
+#   their number, 0 when the source is exhausted (replay)
+#   value: the last raw value, scaled like an 8 bit ADC value
+#   AdcSource / SamplerSource: poll() is read() + feed(counter), the two
+#   can be called separately to time them (see stageProfiler.py)
+###########################################################################
+class AdcSource(object):
+    # one analogRead per poll
+    def __init__(self, adc, channel=0, threshold=THRESHOLD):
+        self.adc = adc
+        self.channel = channel
+        self.threshold = threshold
+        self.value = 0
+        self.timestamp = 0.0
+
+    def read(self):
+        self.value = self.adc.analogRead(self.channel)
+        self.timestamp = timer()
+        return 1
+
+    def feed(self, counter):
+        return counter.feed(self.timestamp, self.value >= self.threshold)
+
+    def poll(self, counter):
+        value = self.value = self.adc.analogRead(self.channel)
+        now = self.timestamp = timer()
+        counter.feed(now, value >= self.threshold)
+        return 1
+
+
+class SamplerSource(object):
+    # drains a running Sampler.Sampler in batches
+    def __init__(self, sampler, batchSize=1024, threshold=THRESHOLD):
+        self.sampler = sampler
+        self.threshold = threshold
+        self.times = array('q', bytes(8 * batchSize))
+        self.values = array('B', bytes(batchSize))
+        self.count = 0      # samples of the last batch, in times / values
+        self.value = 0
+        self.timestamp = 0.0
+
+    def read(self):
+        n = self.count = self.sampler.drainInto(self.times, self.values)
+        if n:
+            self.value = self.values[n - 1]
+            self.timestamp = self.times[n - 1] / 1e9
+        return n
+
+    def feed(self, counter):
+        return counter.feed_many(self.times, self.values, self.count, self.threshold, 1e-9)
+
+    def poll(self, counter):
+        n = self.read()
+        if n:
+            self.feed(counter)
+        return n
+
+
+class ButtonSource(object):
+    # blocks until the button changes to the other level than the counter state
+    # e.g. ButtonSource(hw.button(IR_PIN, pull_up=None, active_state=False)) for the IR breakbeam
+    #      ButtonSource(hw.button(LDR_PIN, bounce_time=0.001)) for the LDR
+    def __init__(self, button):
+        self.button = button
+        self.value = 0
+        self.timestamp = 0.0
+
+    def poll(self, counter):
+        if counter.state:
+            self.button.wait_for_release()
+            self.value = 0
+        else:
+            self.button.wait_for_press()
+            self.value = 255
+        now = self.timestamp = timer()
+        counter.feed(now, self.value != 0)
+        return 1
+
+
+class ReplaySource(object):
+    # feeds the records of a capture file (see capture.py), one channel, batchSize records per poll
+    #   timestamps are the recorded monotonic times in seconds
+    def __init__(self, path, channel=None, batchSize=4096):
+        import capture
+        self.reader = capture.CaptureReader(path)
+        self.channel = self.reader.channel if channel is None else channel
+        self.threshold = THRESHOLD if self.reader.kind == capture.ADC else 1
+        self.records = iter(self.reader)
+        self.times = array('q', bytes(8 * batchSize))
+        self.values = array('H', bytes(2 * batchSize))
+        self.value = 0
+        self.timestamp = 0.0
+
+    def poll(self, counter):
+        times = self.times
+        values = self.values
+        n = 0
+        size = len(times)
+        for timestamp_ns, value, channel, flags in self.records:
+            if channel == self.channel:
+                times[n] = timestamp_ns
+                values[n] = value
+                n += 1
+                if n == size:
+                    break
+        if n:
+            counter.feed_many(times, values, n, self.threshold, 1e-9)
+            self.value = values[n - 1] if self.threshold == THRESHOLD else 255 * values[n - 1]
+            self.timestamp = times[n - 1] / 1e9
+        return n
+
+    def close(self):
+        self.records = iter(())
+        self.reader.close()
+
+
+def createSource(hw, mode="adc", channel=0):
+    """ source for the modes of the scripts: "ir" breakbeam, "digital" LDR, "adc" LDR via ADC channel; hw: hardware.Hardware """
+    if mode == "ir":
+        return ButtonSource(hw.button(IR_PIN, pull_up=None, active_state=False))
+    if mode == "digital":
+        return ButtonSource(hw.button(LDR_PIN, bounce_time=0.001))
+    if mode == "adc":
+        return AdcSource(hw.adc, channel)
+    raise ValueError("unknown mode: " + str(mode))
+
+
+###########################################################################
+# the cycle loop
+#   polls the source forever, prints every completed cycle:
+#   period, frequency, samples ON / OFF and duty cycle
+#   led follows the counter state; when_cycle(counter) after every cycle
+#   profiler: a stageProfiler.StageProfiler(CYCLE_STAGES), times the stages
+#   of every loop: poll (ADC read or wait for the button + counter), led,
+#   text and print
+###########################################################################
+CYCLE_STAGES = ("poll", "led", "text", "print")
+POLL, LED, TEXT, PRINT = range(len(CYCLE_STAGES))
+
+def cycleLoop(source, counter=None, led=None, verbose=False, when_cycle=None, profiler=None):
+    if counter is None:
+        counter = RevolutionCounter(0)     # every change counts
+    if profiler is None:
+        from stageProfiler import StageProfiler
+        profiler = StageProfiler(CYCLE_STAGES)  # disabled; installSignals can enable it
+    startTest = None    # timestamp of the first sample
+    countON = 0
+    countOFF = 0
+    loops = 0
+    if led is not None:
+        led.off()
+    while True:
+        loops += 1
+        profiler.start()
+        startADC = timer()
+        cycles = counter.cycles
+        before = counter.changes
+        if source.poll(counter) == 0:
+            return counter
+        profiler.mark(POLL)
+        now = source.timestamp
+        if startTest is None:
+            startTest = now
+        waitADC = (timer() - startADC) * 1000
+        voltage = source.value / 255.0 * 3.3
+
+        if counter.changes != before and led is not None:
+            led.value = counter.state
+            profiler.mark(LED)
+        if counter.state:
+            if counter.changes != before:
+                # transition OFF -> ON: start next cycle
+                if counter.cycles == cycles:
+                    text = "ON FIRST"
+                else:
+                    period = counter.period
+                    text = "ON cycle: {:>6.1f} ms".format(1000 * period) + " = {:>3.0f} Hz".format(1/period) \
+                        + ", on={:>2d}".format(countON) + ", off={:>2d}".format(countOFF) \
+                        + ", duty={:2.2f}%".format(100 * countON/(countON + countOFF)) \
+                        + ", duration: {:>6.1f}".format(1000 * counter.onTime) + " / {:<6.1f}".format(1000 * (period - counter.onTime)) \
+                        + ", duty: {:5.2f}%".format(100 * counter.onTime / period)
+                    if when_cycle is not None:
+                        when_cycle(counter)
+                countON = 1
+                countOFF = 0
+            else:
+                countON += 1
+                text = "ON"
+        else:
+            countOFF += 1
+            text = "  "
+        profiler.mark(TEXT)
+
+        if verbose == True or text.startswith("ON "):
+            print("{:5}:".format(loops),
+                "time {:2.6f}".format(now - startTest),
+                "after {:>7.3f} ms".format(waitADC),
+                "shows", "{:>4.2f} V:".format(voltage),
+                text,
+                )
+            profiler.mark(PRINT)
+        profiler.end()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : rpmEstimator.py
+# Description : rps / rpm from the timestamps of the registered changes:
+#               spoke periods at low speed, sliding window count at high speed
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+from collections import deque
+
+PERIOD = "period"
+COUNT = "count"
+
+###########################################################################
+# RpmEstimator
+#   count mode:  keeps the change timestamps (seconds) of the last window_s seconds
+#                rate = (changes in window - 1) / (last change - first change)
+#                steady, and it does not restart at zero like a reset window
+#   period mode: keeps the last revolution of changes regardless of the window
+#                rate from the average period of the last complete spokes
+#                (changes_per_spoke changes apart), so it reacts after one spoke
+#
+#   the mode switches automatically with hysteresis:
+#       window holds >= switch_changes changes   -> count
+#       window holds <  switch_changes / 2       -> period
+#
+#   addEdge: append + drop the expired head       amortized O(1)
+#   rps/rpm: drop the expired head + one division amortized O(1)
+###########################################################################
+class RpmEstimator(object):
+    def __init__(self, window_s=2.0, changes_per_spoke=2, number_of_spokes=5, switch_changes=None):
+        self.window_s = window_s
+        self.changesPerSpoke = changes_per_spoke
+        self.numberOfSpokes = number_of_spokes
+        self.changesPerRevolution = changes_per_spoke * number_of_spokes
+        if switch_changes is None:
+            switch_changes = 4 * self.changesPerRevolution
+        self.switchUp = switch_changes
+        self.switchDown = switch_changes // 2
+        self.edges = deque()
+        self.recent = deque(maxlen=self.changesPerRevolution + 1)
+        self.total = 0      # all changes ever added
+        self.mode = PERIOD
+
+    def addEdge(self, now):
+        edges = self.edges
+        edges.append(now)
+        self.recent.append(now)
+        self.total += 1
+        limit = now - self.window_s
+        while edges[0] < limit:
+            edges.popleft()
+        n = len(edges)
+        if self.mode == PERIOD:
+            if n >= self.switchUp:
+                self.mode = COUNT
+        elif n < self.switchDown:
+            self.mode = PERIOD
+
+    def _expire(self, now):
+        edges = self.edges
+        limit = now - self.window_s
+        while edges and edges[0] < limit:
+            edges.popleft()
+        if self.mode == COUNT and len(edges) < self.switchDown:
+            self.mode = PERIOD
+
+    def spokePeriod(self, now=None):
+        """ average period of the last complete spokes (up to one revolution), 0 if unknown """
+        recent = self.recent
+        if len(recent) <= self.changesPerSpoke:
+            return 0.0
+        spokes = (len(recent) - 1) // self.changesPerSpoke
+        period = (recent[-1] - recent[-1 - spokes * self.changesPerSpoke]) / spokes
+        if now is not None and now - recent[-1] > period:
+            period = now - recent[-1]   # a whole spoke without change: slower than the last period
+        return period
+
+    def hzChanges(self, now=None):
+        if now is not None:
+            self._expire(now)
+        if self.mode == PERIOD:
+            period = self.spokePeriod(now)
+            return self.changesPerSpoke / period if period > 0 else 0.0
+        edges = self.edges
+        if len(edges) < 2:
+            return 0.0
+        return (len(edges) - 1) / (edges[-1] - edges[0])
+
+    def rps(self, now=None):
+        return self.hzChanges(now) / self.changesPerRevolution
+
+    def rpm(self, now=None):
+        return self.rps(now) * 60
+
+    def reset(self):
+        self.edges.clear()
+        self.recent.clear()
+        self.mode = PERIOD
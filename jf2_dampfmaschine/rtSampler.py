@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : rtSampler.py
+# Description : ADC acquisition in a dedicated child process (pinned CPU,
+#               optional SCHED_FIFO + mlockall), samples handed over
+#               through a shared memory ring buffer
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import os
+import sys
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from array import array
+from time import monotonic_ns
+
+###########################################################################
+# shared memory layout
+#   header, 8 int64:
+#       capacity, head (samples ever written), stop request, start time (monotonic ns),
+#       pid of the child, status (0 starting, 1 running, -1 no ADC found),
+#       realtime flags (AFFINITY | FIFO | MLOCK), I2C address of the ADC
+#   times:  int64[capacity] monotonic ns
+#   values: uint8[capacity]
+#
+#   one writer (child), one reader (parent): the child writes the slot and
+#   then publishes it with head; the reader keeps its own tail. The writer
+#   never waits: slots the reader did not take in time are overwritten;
+#   after copying, the reader checks head again and drops the slots that
+#   were overwritten meanwhile (counted in overruns); the slot of head
+#   may be in writing, so at most capacity - 1 samples are readable
+###########################################################################
+CAPACITY, HEAD, STOP, START, PID, STATUS, FLAGS, ADDRESS = range(8)
+HEADER_SIZE = 64
+STARTING = 0
+RUNNING = 1
+NO_ADC = -1
+
+AFFINITY = 1
+FIFO = 2
+MLOCK = 4
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+
+def _views(buf, capacity):
+    header = buf[0:HEADER_SIZE].cast('q')
+    times = buf[HEADER_SIZE:HEADER_SIZE + 8 * capacity].cast('q')
+    values = buf[HEADER_SIZE + 8 * capacity:HEADER_SIZE + 9 * capacity]
+    return header, times, values
+
+
+###########################################################################
+# child process
+###########################################################################
+def _realtime(cpu, fifo, priority):
+    """ pin to cpu, optionally SCHED_FIFO and mlockall; returns the flags that worked """
+    flags = 0
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            flags |= AFFINITY
+        except OSError as e:
+            print("rtSampler: sched_setaffinity", cpu, "failed:", e, file=sys.stderr)
+    if fifo:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            flags |= FIFO
+        except OSError as e:
+            print("rtSampler: SCHED_FIFO failed:", e, file=sys.stderr)
+        import ctypes, ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if libc.mlockall(MCL_CURRENT | MCL_FUTURE) == 0:
+            flags |= MLOCK
+        else:
+            print("rtSampler: mlockall failed:", os.strerror(ctypes.get_errno()), file=sys.stderr)
+    return flags
+
+def _acquire(name, capacity, channel, cpu, fifo, priority, interval_s):
+    import gc
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # ctrl-c goes to the parent, it stops the child with STOP
+    from ADCDevice import detectADC
+    shm = shared_memory.SharedMemory(name)
+    header, times, values = _views(shm.buf, capacity)
+    try:
+        header[FLAGS] = _realtime(cpu, fifo, priority)
+        adc = detectADC()
+        if adc is None:
+            header[STATUS] = NO_ADC
+            return
+        header[ADDRESS] = adc.address
+        read = adc.analogRead
+        mask = capacity - 1
+        head = 0
+        gc.collect()
+        gc.disable()    # no collector pauses while sampling; the loop creates no cycles
+        header[START] = monotonic_ns()
+        header[STATUS] = RUNNING
+        deadline = monotonic_ns()
+        interval_ns = int(interval_s * 1e9)
+        while not header[STOP]:
+            value = read(channel)
+            i = head & mask
+            times[i] = monotonic_ns()
+            values[i] = value
+            head += 1
+            header[HEAD] = head
+            if interval_ns:
+                deadline += interval_ns
+                rest = deadline - monotonic_ns()
+                if rest > 0:
+                    time.sleep(rest / 1e9)
+        adc.close()
+    finally:
+        del header, times, values
+        shm.close()
+
+
+###########################################################################
+# RtSampler
+#   same interface as Sampler.Sampler (start, stop, drainInto, drain,
+#   overruns, samplesPerSecond), so SamplerSource works with both
+#
+#   the child is started with "spawn": it opens its own I2C bus and
+#   inherits no threads (LogWriter, LcdService) from the parent
+###########################################################################
+class RtSampler(object):
+    def __init__(self, channel=0, capacity=65536, cpu=None, fifo=False, priority=50, interval_s=0):
+        self.channel = channel
+        self.capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.cpu = cpu
+        self.fifo = fifo
+        self.priority = priority
+        self.interval_s = interval_s
+        self.shm = None
+        self.process = None
+        self.tail = 0
+        self.overruns = 0
+        self.flags = 0
+        self.address = 0
+
+    def start(self, timeout=10.0):
+        if self.process is not None:
+            return
+        size = HEADER_SIZE + 9 * self.capacity
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.header, self.times, self.values = _views(self.shm.buf, self.capacity)
+        self.header[CAPACITY] = self.capacity
+        self.tail = 0
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(target=_acquire, name="RtSampler", daemon=True,
+                                       args=(self.shm.name, self.capacity, self.channel, self.cpu,
+                                             self.fifo, self.priority, self.interval_s))
+        self.process.start()
+        self.header[PID] = self.process.pid
+        limit = time.monotonic() + timeout
+        while self.header[STATUS] == STARTING:
+            if not self.process.is_alive() or time.monotonic() > limit:
+                self.stop()
+                raise RuntimeError("rtSampler: acquisition process did not start")
+            time.sleep(0.01)
+        if self.header[STATUS] == NO_ADC:
+            self.stop()
+            raise IOError("I2C address 0x48 or 0x4b no found.")
+        self.flags = self.header[FLAGS]
+        self.address = self.header[ADDRESS]
+
+    def stop(self):
+        if self.process is not None:
+            self.header[STOP] = 1
+            self.process.join(2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
+        if self.shm is not None:
+            del self.header, self.times, self.values
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    @property
+    def samplesPerSecond(self):
+        start = self.header[START] if self.shm is not None else 0
+        elapsed = monotonic_ns() - start
+        return self.header[HEAD] * 1e9 / elapsed if start and elapsed > 0 else 0.0
+
+    def drainInto(self, times, values):
+        """ copy up to len(times) of the oldest samples into times (array 'q') / values (array 'B'), return the count """
+        capacity = self.capacity
+        tail = self.tail
+        head = self.header[HEAD]
+        # the writer fills slot HEAD before it publishes HEAD + 1: slot head - capacity may be torn
+        if head + 1 - tail > capacity:
+            self.overruns += head + 1 - capacity - tail
+            tail = head + 1 - capacity
+        n = min(head - tail, len(times))
+        start = tail & (capacity - 1)
+        first = min(n, capacity - start)    # up to the end of the ring, the rest wraps around
+        timesView = memoryview(times)
+        valuesView = memoryview(values)
+        timesView[0:first] = self.times[start:start + first]
+        valuesView[0:first] = self.values[start:start + first]
+        timesView[first:n] = self.times[0:n - first]
+        valuesView[first:n] = self.values[0:n - first]
+        del timesView, valuesView
+        self.tail = tail + n
+        # slots the writer overwrote (or is writing) while they were copied
+        lost = min(self.header[HEAD] + 1 - capacity - tail, n)
+        if lost > 0:
+            self.overruns += lost
+            n -= lost
+            times[0:n] = times[lost:lost + n]
+            values[0:n] = values[lost:lost + n]
+        return n
+
+    def drain(self, maxCount=None):
+        """ return (times, values) arrays with up to maxCount of the oldest samples """
+        available = self.header[HEAD] - self.tail
+        n = min(available, self.capacity) if maxCount is None else min(maxCount, available, self.capacity)
+        times = array('q', bytes(8 * n))
+        values = array('B', bytes(n))
+        n = self.drainInto(times, values)
+        return times[:n], values[:n]
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : signalModel.py
+# Description : signal of the spoked wheel of the steam engine at a
+#               programmable rpm profile: LDR voltage (ADC code) or
+#               breakbeam level, with noise and contact bounce
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import math
+import random
+import threading
+import time
+from bisect import bisect_right
+
+###########################################################################
+# SpokedWheel
+#   profile: constant rpm, or [(t_s, rpm), ...] linearly interpolated,
+#       the last rpm holds after the last point; t from start()
+#   every spoke period is HIGH for the first duty part, LOW for the rest:
+#       2 changes per spoke, like the counters expect (changes_per_spoke)
+#   bounce_s / bounces: after every change the level flips back bounces
+#       times within bounce_s
+#   noise: standard deviation of the ADC code, in codes
+#
+#   value() / level() use the clock; value(t) / level(t) any time t
+#   setProfile() continues at the current angle with the new profile
+###########################################################################
+class SpokedWheel(object):
+    def __init__(self, profile=60, number_of_spokes=5, duty=0.5, high=200, low=30,
+                 noise=0.0, bounce_s=0.0, bounces=2, seed=None, clock=time.monotonic):
+        self.spokes = number_of_spokes
+        self.duty = duty
+        self.high = high
+        self.low = low
+        self.noise = noise
+        self.bounce_s = bounce_s
+        self.bounces = bounces
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.offset = 0.0       # revolutions before the current profile
+        self.times = None
+        self.start()
+        self.setProfile(profile)
+
+    def start(self):
+        self.t0 = self.clock()
+
+    def now(self):
+        return self.clock() - self.t0
+
+    def setProfile(self, profile):
+        if not isinstance(profile, (list, tuple)):
+            profile = [(0.0, profile)]
+        if self.times is not None:
+            now = self.now()
+            self.offset = self.revolutions(now)
+            self.t0 += now
+        self.times = [t for t, rpm in profile]
+        self.rpms = [rpm for t, rpm in profile]
+        # revolutions at the profile points
+        self.cumulative = [0.0]
+        for i in range(1, len(profile)):
+            dt = self.times[i] - self.times[i - 1]
+            self.cumulative.append(self.cumulative[-1] + (self.rpms[i - 1] + self.rpms[i]) / 2 * dt / 60)
+
+    def rpm(self, t=None):
+        if t is None:
+            t = self.now()
+        i = bisect_right(self.times, t) - 1
+        if i < 0:
+            return self.rpms[0]
+        if i == len(self.times) - 1:
+            return self.rpms[-1]
+        t0, t1 = self.times[i], self.times[i + 1]
+        return self.rpms[i] + (self.rpms[i + 1] - self.rpms[i]) * (t - t0) / (t1 - t0)
+
+    def revolutions(self, t=None):
+        """ revolutions since the start, exact integral of the profile """
+        if t is None:
+            t = self.now()
+        i = bisect_right(self.times, t) - 1
+        if i < 0:
+            return self.offset + self.rpms[0] * t / 60
+        return self.offset + self.cumulative[i] + (self.rpms[i] + self.rpm(t)) / 2 * (t - self.times[i]) / 60
+
+    def changes(self, t0, t1):
+        """ number of changes (without bounce) between t0 and t1 """
+        s0 = self.revolutions(t0) * self.spokes
+        s1 = self.revolutions(t1) * self.spokes
+        floor = math.floor
+        return floor(s1) - floor(s0) + floor(s1 - self.duty) - floor(s0 - self.duty)
+
+    def level(self, t=None):
+        if t is None:
+            t = self.now()
+        spoke = self.revolutions(t) * self.spokes
+        phase = spoke - int(spoke)
+        level = phase < self.duty
+        if self.bounce_s > 0:
+            rate = self.rpm(t) / 60 * self.spokes      # spoke periods per second
+            if rate > 0:
+                since = (phase if level else phase - self.duty) / rate
+                if since < self.bounce_s and int(since / self.bounce_s * (2 * self.bounces + 1)) & 1:
+                    level = not level
+        return level
+
+    def value(self, t=None):
+        """ ADC code 0..255 of the LDR voltage """
+        code = self.high if self.level(t) else self.low
+        if self.noise:
+            code = int(round(self.random.gauss(code, self.noise)))
+            code = 0 if code < 0 else 255 if code > 255 else code
+        return code
+
+
+###########################################################################
+# PinDriver
+#   drives a gpiozero mock pin (MockFactory) with the level of the wheel,
+#   for the LDR (activeHigh) or the inverted IR breakbeam
+#   the pin is updated every interval_s from a thread
+###########################################################################
+class PinDriver(object):
+    def __init__(self, wheel, pin, activeHigh=True, interval_s=0.0001):
+        self.wheel = wheel
+        self.pin = pin          # e.g. Device.pin_factory.pin(18)
+        self.activeHigh = activeHigh
+        self.interval_s = interval_s
+        self.changes = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="PinDriver", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        last = None
+        while self.running:
+            high = self.wheel.level() == self.activeHigh
+            if high != last:
+                if high:
+                    self.pin.drive_high()
+                else:
+                    self.pin.drive_low()
+                if last is not None:
+                    self.changes += 1
+                last = high
+            time.sleep(self.interval_s)
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
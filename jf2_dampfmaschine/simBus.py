@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : simBus.py
+# Description : simulated I2C bus with the modules of the steam engine
+#               test stand: PCF8591, ADS7830 and the PCF8574 backpack of
+#               the LCD1602 (HD44780 with DDRAM), realistic bus timing
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import errno
+import time
+from time import perf_counter
+
+###########################################################################
+# usage, instead of the real bus (no smbus, no I2C needed):
+#       wheel = signalModel.SpokedWheel(600)
+#       adc = PCF8591Sim(inputs=[wheel.value])
+#       lcd = PCF8574LcdSim()
+#       i2cBus.setBusFactory(lambda busnum: SimBus([adc, lcd]))
+#       ... the drivers (ADCDevice, CharLCD1602, PCF8574_I2C) work as usual
+#       print(lcd.lcd.text)
+#
+#   every SMBus call is split into its I2C messages: the device gets the
+#   written bytes (write) and delivers the read bytes (read), like on the
+#   wire; an address without device raises OSError (no acknowledge)
+#
+#   timing: each call sleeps overhead_s (i2c-dev ioctl) + the bits on the
+#   wire at clock_hz, 9 bits per byte incl. the address bytes;
+#   timeScale 0 runs without delays, 0.1 ten times faster than real
+###########################################################################
+CLOCK_HZ = 100000       # bus speed of the Raspberry Pi default
+OVERHEAD_S = 50e-6      # kernel and driver time of one transaction
+SPIN_S = 100e-6         # the rest of a delay is spun, sleep is not that precise
+
+
+class SimDevice(object):
+    # base of the simulated modules: write(bytes) / read(n) per I2C message
+    byteTime = 9 / CLOCK_HZ     # wire time of one byte, set by the SimBus
+
+    def __init__(self, address):
+        self.address = address
+        self.writes = 0
+        self.reads = 0
+
+    def write(self, data):
+        self.writes += 1
+
+    def read(self, n):
+        self.reads += 1
+        return [0xff] * n
+
+
+def _input(source):
+    # channel input: a constant code or a function returning the code 0..255
+    if callable(source):
+        return source
+    return lambda: source
+
+
+###########################################################################
+# PCF8591: 4 channel ADC
+#   control byte: auto increment 0x04, channel 0x03; a read returns the
+#   result of the previous conversion and starts the next one
+###########################################################################
+class PCF8591Sim(SimDevice):
+    AUTO_INCREMENT = 0x04
+
+    def __init__(self, address=0x48, inputs=()):
+        super(PCF8591Sim, self).__init__(address)
+        self.inputs = [_input(source) for source in inputs] + [_input(0)] * (4 - len(inputs))
+        self.control = 0
+        self.channel = 0
+        self.last = 0x80    # conversion result after power on
+        self.dac = 0
+        self.conversions = 0
+
+    def write(self, data):
+        super(PCF8591Sim, self).write(data)
+        if data:
+            self.control = data[0]
+            self.channel = data[0] & 0x03
+        if len(data) > 1:
+            self.dac = data[-1]
+
+    def read(self, n):
+        self.reads += 1
+        result = []
+        for i in range(n):
+            result.append(self.last)
+            self.last = self.inputs[self.channel]() & 0xff
+            self.conversions += 1
+            if self.control & self.AUTO_INCREMENT:
+                self.channel = (self.channel + 1) & 0x03
+        return result
+
+
+###########################################################################
+# ADS7830: 8 channel ADC
+#   command byte: single ended 0x80, channel select bits 6..4 (odd
+#   channels in the upper half, see ADCDevice.ADS7830.cmdTable);
+#   every read converts the selected channel
+###########################################################################
+class ADS7830Sim(SimDevice):
+    CHANNELS = {((chn << 2 | chn >> 1) & 0x07): chn for chn in range(8)}   # select bits -> channel
+
+    def __init__(self, address=0x4b, inputs=()):
+        super(ADS7830Sim, self).__init__(address)
+        self.inputs = [_input(source) for source in inputs] + [_input(0)] * (8 - len(inputs))
+        self.channel = 0
+        self.conversions = 0
+
+    def write(self, data):
+        super(ADS7830Sim, self).write(data)
+        if data:
+            self.channel = self.CHANNELS[(data[-1] >> 4) & 0x07]
+
+    def read(self, n):
+        self.reads += 1
+        self.conversions += n
+        source = self.inputs[self.channel]
+        return [source() & 0xff for i in range(n)]
+
+
+###########################################################################
+# HD44780
+#   the instruction set as far as the drivers use it: 8 / 4 bit interface,
+#   clear, home, entry mode, display control, cursor shift, CGRAM / DDRAM
+#   address and data; 2 lines: DDRAM 0x00..0x27 and 0x40..0x67
+#
+#   busy: an instruction that arrives while the previous one still
+#   executes (clear 1.52 ms, others 37 us) is counted in busyViolations
+###########################################################################
+class HD44780(object):
+    EXECUTE_S = 37e-6
+    CLEAR_S = 1.52e-3
+
+    def __init__(self, cols=16, rows=2, timeScale=1.0):
+        self.cols = cols
+        self.rows = rows
+        self.timeScale = timeScale
+        self.ddram = bytearray(b" " * 0x80)
+        self.cgram = bytearray(0x40)
+        self.address = 0
+        self.toCgram = False    # data goes into CGRAM after a CGRAM address
+        self.increment = True
+        self.eightBit = True    # after power on
+        self.displayOn = False
+        self.high = None        # 4 bit interface: the high nibble, waiting for the low one
+        self.instructions = 0
+        self.characters = 0
+        self.busyUntil = 0.0
+        self.busyViolations = 0
+
+    def latch(self, rs, nibble, now):
+        """ falling edge of E at now (perf_counter): D7..D4 = nibble (D3..D0 are not connected) """
+        if self.eightBit:
+            self.execute(rs, nibble << 4, now)
+        elif self.high is None:
+            self.high = nibble
+        else:
+            value = self.high << 4 | nibble
+            self.high = None
+            self.execute(rs, value, now)
+
+    def execute(self, rs, value, now):
+        if now < self.busyUntil:
+            self.busyViolations += 1
+        duration = self.EXECUTE_S
+        if rs:
+            self.characters += 1
+            if self.toCgram:
+                self.cgram[self.address & 0x3f] = value
+                self.address = (self.address + (1 if self.increment else -1)) & 0x3f
+            else:
+                self.ddram[self.address] = value
+                self._move(1 if self.increment else -1)
+        else:
+            self.instructions += 1
+            if value & 0x80:        # set DDRAM address
+                self.address = value & 0x7f
+                self.toCgram = False
+            elif value & 0x40:      # set CGRAM address
+                self.address = value & 0x3f
+                self.toCgram = True
+            elif value & 0x20:      # function set
+                self.eightBit = bool(value & 0x10)
+                self.high = None
+            elif value & 0x10:      # cursor / display shift: only the cursor is emulated
+                if not value & 0x08:
+                    self._move(1 if value & 0x04 else -1)
+            elif value & 0x08:      # display on / off control
+                self.displayOn = bool(value & 0x04)
+            elif value & 0x04:      # entry mode set
+                self.increment = bool(value & 0x02)
+            elif value & 0x02:      # return home
+                self.address = 0
+                self.toCgram = False
+                duration = self.CLEAR_S
+            elif value & 0x01:      # clear display
+                self.ddram[:] = b" " * len(self.ddram)
+                self.address = 0
+                self.toCgram = False
+                self.increment = True
+                duration = self.CLEAR_S
+        self.busyUntil = now + duration * self.timeScale
+
+    def _move(self, step):
+        # DDRAM address of the next cell, the two lines wrap into each other
+        address = self.address + step
+        if address == 0x28:
+            address = 0x40
+        elif address == 0x68:
+            address = 0x00
+        elif address == 0x3f:
+            address = 0x27
+        elif address == -1:
+            address = 0x67
+        self.address = address
+
+    def line(self, row):
+        start = 0x40 * row
+        return self.ddram[start:start + self.cols].decode("latin-1")
+
+    @property
+    def text(self):
+        return "\n".join(self.line(row) for row in range(self.rows))
+
+
+###########################################################################
+# PCF8574 LCD backpack
+#   every written byte is a port write: P0 RS, P1 RW, P2 E, P3 backlight,
+#   P4..P7 D4..D7 of the HD44780; the display latches on the falling edge
+#   of E. The bytes of one message are byteTime apart, the last one at the
+#   end of the transaction
+###########################################################################
+class PCF8574LcdSim(SimDevice):
+    RS = 0x01
+    E = 0x04
+    BACKLIGHT = 0x08
+
+    def __init__(self, address=0x27, cols=16, rows=2, timeScale=1.0):
+        super(PCF8574LcdSim, self).__init__(address)
+        self.lcd = HD44780(cols, rows, timeScale)
+        self.port = 0xff        # quasi-bidirectional: high after power on
+        self.portWrites = 0
+
+    @property
+    def backlight(self):
+        return bool(self.port & self.BACKLIGHT)
+
+    def write(self, data):
+        super(PCF8574LcdSim, self).write(data)
+        lcd = self.lcd
+        E = self.E
+        now = perf_counter() - len(data) * self.byteTime
+        for value in data:
+            now += self.byteTime
+            if self.port & E and not value & E:
+                lcd.latch(value & self.RS, value >> 4, now)
+            self.port = value
+        self.portWrites += len(data)
+
+    def read(self, n):
+        self.reads += 1
+        return [self.port] * n
+
+
+###########################################################################
+# SimBus
+#   same methods as smbus.SMBus, for i2cBus.setBusFactory
+###########################################################################
+class SimBus(object):
+    def __init__(self, devices=(), clock_hz=CLOCK_HZ, overhead_s=OVERHEAD_S, timeScale=1.0):
+        self.devices = {device.address: device for device in devices}
+        self.byteTime = 9 / clock_hz
+        for device in devices:
+            device.byteTime = self.byteTime * timeScale
+        self.overhead_s = overhead_s
+        self.timeScale = timeScale
+        self.transactions = 0
+        self.busTime_s = 0.0    # simulated time on the bus
+        self.closed = False
+
+    def _device(self, addr, wireBytes):
+        # one transaction: the delay, then the device or no acknowledge
+        self.transactions += 1
+        device = self.devices.get(addr)
+        if device is None:
+            wireBytes = 1       # the address byte is not acknowledged
+        duration = self.overhead_s + wireBytes * self.byteTime
+        self.busTime_s += duration
+        self._wait(duration * self.timeScale)
+        if device is None:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        return device
+
+    @staticmethod
+    def _wait(duration):
+        if duration <= 0:
+            return
+        deadline = perf_counter() + duration
+        if duration > SPIN_S:
+            time.sleep(duration - SPIN_S)
+        while perf_counter() < deadline:
+            pass
+
+    def read_byte(self, addr):
+        return self._device(addr, 2).read(1)[0]
+
+    def write_byte(self, addr, value):
+        self._device(addr, 2).write([value])
+
+    def read_byte_data(self, addr, cmd):
+        device = self._device(addr, 4)
+        device.write([cmd])
+        return device.read(1)[0]
+
+    def write_byte_data(self, addr, cmd, value):
+        self._device(addr, 3).write([cmd, value])
+
+    def read_word_data(self, addr, cmd):
+        device = self._device(addr, 5)
+        device.write([cmd])
+        low, high = device.read(2)
+        return low | high << 8
+
+    def write_word_data(self, addr, cmd, value):
+        self._device(addr, 4).write([cmd, value & 0xff, value >> 8])
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        device = self._device(addr, 3 + length)
+        device.write([cmd])
+        return device.read(length)
+
+    def write_i2c_block_data(self, addr, cmd, values):
+        self._device(addr, 2 + len(values)).write([cmd] + list(values))
+
+    def close(self):
+        self.closed = True
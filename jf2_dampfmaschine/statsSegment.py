@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : statsSegment.py
+# Description : live statistics of a running counter in a small shared
+#               memory segment (seqlock), and a top-like viewer for it
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import os
+import struct
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+###########################################################################
+# segment layout (little endian, fixed)
+#   sequence uint64: odd while the writer updates the fields
+#   fields, see FIELDS / RECORD
+#
+#   seqlock: the writer increments the sequence before and after writing;
+#   a reader copies the fields and retries if the sequence was odd or
+#   changed meanwhile. The writer never waits for readers, any number of
+#   readers can attach.
+###########################################################################
+DEFAULT_NAME = "jf2_stats"
+SEQUENCE = struct.Struct("<Q")
+FIELDS = ("pid", "updated_ns", "samples", "changes", "ignored", "overruns", "mode",
+          "rps", "rpm", "samplesPerSecond", "period", "loopMean", "loopMax")
+RECORD = struct.Struct("<qqqqqqqdddddd")
+SIZE = SEQUENCE.size + RECORD.size
+MODES = ("period", "count")     # mode field: index of RpmEstimator.mode
+
+STALE_S = 2.0   # viewer: no update for this long = writer stopped
+
+
+###########################################################################
+# LoopTimer
+#   loop iteration times between two publish calls: mean and max
+#   iterations / total_ns / max_ns: since the start (metrics)
+###########################################################################
+class LoopTimer(object):
+    def __init__(self):
+        self.start()
+        self.total = 0
+        self.count = 0
+        self.max = 0
+        self.iterations = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def start(self):
+        """ call at the entry of the loop: the first iteration starts now """
+        self.last = time.perf_counter_ns()
+
+    def tick(self):
+        now = time.perf_counter_ns()
+        elapsed = now - self.last
+        self.last = now
+        self.total += elapsed
+        self.count += 1
+        self.iterations += 1
+        self.total_ns += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+            if elapsed > self.max_ns:
+                self.max_ns = elapsed
+
+    def take(self):
+        """ (mean s, max s) since the last take """
+        result = (self.total / self.count / 1e9 if self.count else 0.0, self.max / 1e9)
+        self.total = self.count = self.max = 0
+        return result
+
+
+###########################################################################
+# StatsWriter
+#   creates the segment; a segment of that name whose writer still runs
+#   raises FileExistsError, one of a crashed writer is replaced;
+#   publish() is a few struct packs, call it every interval_s from the loop:
+#       if now >= statsWriter.due: statsWriter.publishCounter(...)
+###########################################################################
+class StatsWriter(object):
+    def __init__(self, name=DEFAULT_NAME, interval_s=0.2):
+        try:
+            old = shared_memory.SharedMemory(name)
+        except FileNotFoundError:
+            pass
+        else:
+            pid = RECORD.unpack_from(old.buf, SEQUENCE.size)[0] if old.size >= SIZE else 0
+            if pid and _alive(pid):
+                resource_tracker.unregister(old._name, "shared_memory")    # not ours: leave it to its writer
+                old.close()
+                raise FileExistsError("statistics segment {} is in use by pid {}".format(name, pid))
+            old.close()
+            old.unlink()
+        self.shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        self.buf = self.shm.buf
+        self.name = name
+        self.interval_s = interval_s
+        self.due = 0.0          # next publish, in the clock of the caller
+        self.sequence = 0
+        self.pid = os.getpid()
+        RECORD.pack_into(self.buf, SEQUENCE.size, self.pid, 0, 0, 0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)   # the owner, before the first publish
+        self.lastSamples = 0
+        self.lastTime = time.monotonic_ns()
+        self.rate = 0.0
+        self.publishes = 0
+
+    def publish(self, samples, changes, ignored, overruns, mode, rps, rpm, period, loopMean, loopMax):
+        now = time.monotonic_ns()
+        if now > self.lastTime:
+            self.rate = (samples - self.lastSamples) * 1e9 / (now - self.lastTime)
+        self.lastSamples = samples
+        self.lastTime = now
+        buf = self.buf
+        self.sequence += 1      # odd: update in progress
+        SEQUENCE.pack_into(buf, 0, self.sequence)
+        RECORD.pack_into(buf, SEQUENCE.size, self.pid, now, samples, changes, ignored, overruns, mode,
+                         rps, rpm, self.rate, period, loopMean, loopMax)
+        self.sequence += 1
+        SEQUENCE.pack_into(buf, 0, self.sequence)
+        self.publishes += 1
+
+    def publishCounter(self, counter, now, overruns=0, loopTimer=None):
+        """ publish a revolutionEngine.RevolutionCounter; now: time of the last sample, same clock as due """
+        rps = counter.rps(now)
+        loopMean, loopMax = loopTimer.take() if loopTimer is not None else (0.0, 0.0)
+        self.publish(counter.samples, counter.changes, counter.ignored, overruns,
+                     MODES.index(counter.estimator.mode), rps, rps * 60, counter.period, loopMean, loopMax)
+        self.due = now + self.interval_s
+
+    def close(self):
+        if self.shm is not None:
+            del self.buf
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+###########################################################################
+# StatsReader
+#   attaches to the segment of a running writer; read() returns a dict,
+#   or None if the sequence stays odd for timeout_s (the writer died in
+#   the middle of an update)
+###########################################################################
+class StatsReader(object):
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = shared_memory.SharedMemory(name)
+        # the segment belongs to the writer: do not unlink it when the reader exits
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.buf = self.shm.buf
+        self.retries = 0
+
+    def read(self, timeout_s=0.1):
+        buf = self.buf
+        deadline = time.monotonic() + timeout_s
+        while True:
+            before = SEQUENCE.unpack_from(buf, 0)[0]
+            if before & 1 == 0:
+                values = RECORD.unpack_from(buf, SEQUENCE.size)
+                if SEQUENCE.unpack_from(buf, 0)[0] == before:
+                    return dict(zip(FIELDS, values), sequence=before)
+            self.retries += 1
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(0)
+
+    def close(self):
+        if self.shm is not None:
+            del self.buf
+            self.shm.close()
+            self.shm = None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def show(stats):
+    """ the viewer screen of one read() """
+    age = (time.monotonic_ns() - stats["updated_ns"]) / 1e9
+    state = "running" if age < STALE_S else ("stale" if _alive(stats["pid"]) else "stopped")
+    lines = [
+        "pid {:<8} {:<8} updated {:6.2f} s ago   (seq {})".format(stats["pid"], state, age, stats["sequence"]),
+        "",
+        "rps       {:10.2f}   rpm     {:10.2f}   mode {}".format(stats["rps"], stats["rpm"], MODES[stats["mode"]]),
+        "period    {:10.3f} ms".format(1000 * stats["period"]),
+        "samples/s {:10.0f}   samples {:10}".format(stats["samplesPerSecond"], stats["samples"]),
+        "changes   {:10}   ignored {:10}   overruns {}".format(stats["changes"], stats["ignored"], stats["overruns"]),
+        "loop      {:10.3f} ms mean {:8.3f} ms max".format(1000 * stats["loopMean"], 1000 * stats["loopMax"]),
+    ]
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':   # Program entrance
+    import argparse
+    parser  = argparse.ArgumentParser()
+    parser.add_argument("name", help="segment name; default " + DEFAULT_NAME, nargs="?", default=DEFAULT_NAME)
+    parser.add_argument("-i", "--interval", help="seconds between two refreshes; default 1", type=float, default=1.0)
+    parser.add_argument("-1", "--once", help="print once and exit", action="store_true")
+    args = parser.parse_args()
+    try:
+        reader = StatsReader(args.name)
+    except FileNotFoundError:
+        print("no statistics segment", args.name, "- start the counter with --stats")
+        exit(1)
+    try:
+        while True:
+            stats = reader.read()
+            text = show(stats) if stats is not None else "segment {}: the writer stopped in the middle of an update".format(args.name)
+            if args.once:
+                print(text)
+                break
+            print("\x1b[H\x1b[2J" + text, flush=True)  # home + clear screen
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
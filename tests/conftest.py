@@ -0,0 +1,26 @@
+########################################################################
+# Filename    : conftest.py
+# Description : pytest setup: the modules of jf2_dampfmaschine are flat
+#               scripts, importable from their directory; every test gets
+#               a fresh bus registry with a simulated bus factory
+# Author      : j.fellner@logics.de
+# date        : 2026-10-18
+########################################################################
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "jf2_dampfmaschine"))
+
+import i2cBus
+import i2cDiscovery
+
+
+@pytest.fixture(autouse=True)
+def simulatedBus(tmp_path, monkeypatch):
+    """ no real I2C: tests set their SimBus with i2cBus.setBusFactory; the address cache goes into tmp_path """
+    monkeypatch.setattr(i2cDiscovery, "CACHE_PATH", str(tmp_path / "i2c.json"))
+    yield
+    i2cBus.setBusFactory(None)
+    for busnum in list(i2cBus._tracers):
+        i2cBus.stopTrace(busnum)
@@ -0,0 +1,22 @@
+import benchmark
+from ADCDevice import PCF8591
+from revolutionEngine import AdcSource
+from signalModel import SpokedWheel
+
+
+def test_measure_low_rpm():
+    # real bus timing (about 1000 samples/s) and 20 changes/s: 50 ms between two
+    # changes, far from the 5 ms debounce even on a loaded machine
+    wheel = SpokedWheel(120, 5)
+    benchmark.simulate(wheel, "pcf8591", timeScale=1.0)
+    adc = PCF8591()
+    try:
+        rpm, counted, error, displayed, samplesPerSecond, changes, expected, ignored = \
+            benchmark.measure(AdcSource(adc, 0), wheel, 120, 1.0)
+    finally:
+        adc.close()
+    assert rpm == 120
+    assert error < 0.02
+    assert ignored == 0
+    assert abs(changes - expected) <= 1     # the first change may come from the initial state
+    assert samplesPerSecond > 10 * 20
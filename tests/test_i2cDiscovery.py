@@ -0,0 +1,32 @@
+import json
+import pytest
+import i2cBus
+import i2cDiscovery
+from simBus import SimBus, PCF8591Sim
+
+
+@pytest.mark.parametrize("content", ["null", "[]", "42", '"0x48"', "{not json",
+                                     '{"1/adc": "0x48"}', '{"1/adc": 72.0}', '{"1/adc": 80}'])
+def test_corrupt_cache(tmp_path, content):
+    path = tmp_path / "i2c.json"
+    path.write_text(content)
+    i2cBus.setBusFactory(lambda busnum: SimBus([PCF8591Sim()], timeScale=0))
+    assert i2cDiscovery.find("adc", 1, str(path)) == 0x48
+    assert json.loads(path.read_text()) == {"1/adc": 0x48}
+
+
+def test_cached_address_is_probed_first(tmp_path):
+    path = tmp_path / "i2c.json"
+    path.write_text('{"1/adc": 75}')        # ADS7830
+    bus = SimBus([PCF8591Sim(), PCF8591Sim(address=0x4b)], timeScale=0)
+    i2cBus.setBusFactory(lambda busnum: bus)
+    assert i2cDiscovery.find("adc", 1, str(path)) == 0x4b
+    assert bus.transactions == 1
+
+
+def test_no_device_removes_the_entry(tmp_path):
+    path = tmp_path / "i2c.json"
+    path.write_text('{"1/adc": 72, "1/lcd": 39}')
+    i2cBus.setBusFactory(lambda busnum: SimBus([PCF8591Sim()], timeScale=0))
+    assert i2cDiscovery.find("lcd", 1, str(path)) is None
+    assert json.loads(path.read_text()) == {"1/adc": 72}
@@ -0,0 +1,41 @@
+import pytest
+import i2cTrace
+from i2cTrace import TracingSMBus, traceStats, READ_BYTE, READ_BYTE_DATA
+from simBus import SimBus, PCF8591Sim
+
+
+def counters(stats):
+    return {address: (s.calls, s.errors, s.bytesRead, s.bytesWritten, s.ops) for address, s in stats.addresses.items()}
+
+
+def test_failed_calls_count_no_bytes_live_and_offline(tmp_path):
+    path = str(tmp_path / "bus.trace")
+    bus = TracingSMBus(SimBus([PCF8591Sim()], timeScale=0), path)
+    for cmd in (0x40, 0x41, 0x42):
+        with pytest.raises(OSError):
+            bus.read_byte_data(0x50, cmd)       # no device: no acknowledge
+    bus.read_byte(0x48)
+    bus.write_i2c_block_data(0x48, 0x40, [1, 2, 3])
+    bus.closeTrace()
+
+    live = bus.stats.addresses
+    assert (live[0x50].calls, live[0x50].errors, live[0x50].bytesRead, live[0x50].bytesWritten) == (3, 3, 0, 0)
+    assert (live[0x48].bytesRead, live[0x48].bytesWritten) == (1, 4)
+    offline, elapsed = traceStats(path)
+    assert counters(offline) == counters(bus.stats)
+    assert offline.addresses[0x50].ops == {READ_BYTE_DATA: 3}
+    assert offline.addresses[0x48].ops[READ_BYTE] == 1
+
+
+def test_trace_file_records(tmp_path):
+    path = str(tmp_path / "bus.trace")
+    bus = TracingSMBus(SimBus([PCF8591Sim()], timeScale=0), path, busnum=1, bufferRecords=2)
+    for i in range(5):                          # flushes on the way, the rest on closeTrace
+        bus.read_byte_data(0x48, 0x40)
+    bus.closeTrace()
+    header, records = i2cTrace.readTrace(path)
+    records = list(records)
+    assert header["busnum"] == 1
+    assert len(records) == 5
+    assert all(op == READ_BYTE_DATA and address == 0x48 and cmd == 0x40 and length == 2
+               for start, duration, op, address, cmd, length in records)
@@ -0,0 +1,92 @@
+import pytest
+import i2cBus
+import LCD1602
+from ADCDevice import PCF8591, ADS7830
+from LCD1602 import CharLCD1602
+from simBus import SimBus, PCF8591Sim, ADS7830Sim, PCF8574LcdSim
+from signalModel import SpokedWheel
+
+
+def simulate(*devices):
+    bus = SimBus(devices, timeScale=0)
+    i2cBus.setBusFactory(lambda busnum: bus)
+    return bus
+
+
+###########################################################################
+# ADC channel selection
+###########################################################################
+PCF8591_INPUTS = [10, 90, 170, 250]
+ADS7830_INPUTS = [8, 40, 72, 104, 136, 168, 200, 232]
+
+
+def test_pcf8591_channels():
+    simulate(PCF8591Sim(inputs=PCF8591_INPUTS))
+    adc = PCF8591()
+    assert [adc.analogRead(chn) for chn in (2, 0, 3, 1)] == [170, 10, 250, 90]
+    assert list(adc.scan()) == PCF8591_INPUTS
+    assert list(adc.scan([1, 3])) == [90, 250]
+    assert list(adc.analogReadBurst(3, 40)) == [250] * 40     # two block reads
+    adc.close()
+
+
+def test_ads7830_channels():
+    simulate(ADS7830Sim(inputs=ADS7830_INPUTS))
+    adc = ADS7830()
+    assert [adc.analogRead(chn) for chn in range(8)] == ADS7830_INPUTS
+    assert list(adc.scan([7, 2, 5])) == [232, 72, 168]
+    assert list(adc.analogReadBurst(6, 5)) == [200] * 5
+    adc.close()
+
+
+###########################################################################
+# LCD1602 on the PCF8574 backpack: DDRAM of the HD44780
+###########################################################################
+def startLcd(fast, monkeypatch):
+    monkeypatch.setattr(LCD1602.time, "sleep", lambda s: None)     # the simulated display is never busy
+    sim = PCF8574LcdSim(timeScale=0)
+    simulate(sim)
+    lcd = CharLCD1602(fast=fast)
+    lcd.LCD_ADDR = sim.address
+    for command in (0x33, 0x32, 0x28, 0x0C):    # init sequence of init_lcd
+        lcd.send_command(command)
+    lcd.clear()
+    return lcd, sim
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_lcd_write(fast, monkeypatch):
+    lcd, sim = startLcd(fast, monkeypatch)
+    lcd.write(0, 0, "Hello World!")
+    lcd.write(3, 1, "rpm 480")
+    assert sim.lcd.text == "Hello World!    \n   rpm 480      "
+    assert sim.lcd.displayOn and not sim.lcd.eightBit
+    lcd.write(3, 1, "rpm 481")          # only the changed cell
+    assert sim.lcd.line(1) == "   rpm 481      "
+    writes = sim.portWrites
+    lcd.write(0, 0, "Hello World!")     # unchanged: nothing sent
+    assert sim.portWrites == writes
+    lcd.write(0, 0, "5 €")            # beyond the character set
+    assert sim.lcd.line(0) == "5 ?lo World!    "
+    lcd.close()
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_lcd_write_clips_at_the_line_end(fast, monkeypatch):
+    lcd, sim = startLcd(fast, monkeypatch)
+    lcd.write(10, 0, "0123456789")
+    assert sim.lcd.text == "          012345\n                "
+    lcd.close()
+
+
+###########################################################################
+# SpokedWheel
+###########################################################################
+def test_wheel_changes():
+    clock = [0.0]
+    wheel = SpokedWheel(60, 5, clock=lambda: clock[0])     # one revolution per second
+    assert wheel.changes(0.0, 1.0) == 10
+    assert wheel.level(0.05) and not wheel.level(0.15)
+    clock[0] = 0.5
+    wheel.setProfile(120)               # continues at half a revolution
+    assert wheel.changes(0.0, 0.5) == 10